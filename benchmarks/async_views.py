@@ -0,0 +1,134 @@
+"""
+Compares submitting SingleFormViews whose actions call a slow API - a local stub which responds after a delay -
+with SingleFormView on a pool of threads (as under a WSGI server) and with AsyncSingleFormView on one event loop
+(as under an ASGI server), with async and sync actions
+
+Run from a project using lite_forms, with DJANGO_SETTINGS_MODULE set:
+python -m lite_forms.benchmarks.async_views
+"""
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+DELAY = 0.05
+
+
+async def handle(reader, writer):
+    """
+    Responds to a request with an empty JSON object after DELAY seconds
+    """
+    headers = await reader.readuntil(b"\r\n\r\n")
+    for header in headers.lower().split(b"\r\n"):
+        if header.startswith(b"content-length:"):
+            await reader.readexactly(int(header.split(b":")[1]))
+    await asyncio.sleep(DELAY)
+    writer.write(
+        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}"
+    )
+    await writer.drain()
+    writer.close()
+
+
+def start_stub_api():
+    """
+    Starts the stub API in a thread with its own event loop, returning its host and port
+    """
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024))
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return server.sockets[0].getsockname()[:2]
+
+
+def sync_action(host, port):
+    def action(request, data):
+        request = urllib.request.Request(f"http://{host}:{port}/", json.dumps(data).encode())
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read()), response.status
+
+    return action
+
+
+def async_action(host, port):
+    async def action(request, data):
+        reader, writer = await asyncio.open_connection(host, port)
+        body = json.dumps(data).encode()
+        writer.write(b"POST / HTTP/1.1\r\nHost: %s\r\nContent-Length: %d\r\n\r\n%s" % (host.encode(), len(body), body))
+        await writer.drain()
+        await reader.readuntil(b"\r\n\r\n")
+        response = await reader.read()
+        writer.close()
+        return json.loads(response), 200
+
+    return action
+
+
+def build_view(base, action):
+    from lite_forms.components import Form, TextInput
+
+    class View(base):
+        success_url = "/done"
+
+        def init(self, request, **kwargs):
+            self.form = Form("Name", questions=[TextInput("name")])
+            self.action = action
+
+    return View.as_view()
+
+
+def build_requests(number):
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    return [factory.post("/", {"name": f"Name {index}"}) for index in range(number)]
+
+
+def run_threaded(view, number, threads):
+    with ThreadPoolExecutor(threads) as executor:
+        responses = list(executor.map(view, build_requests(number)))
+    assert all(response.status_code == 302 for response in responses)
+
+
+def run_async(view, number):
+    async def submit():
+        return await asyncio.gather(*(view(request) for request in build_requests(number)))
+
+    responses = asyncio.run(submit())
+    assert all(response.status_code == 302 for response in responses)
+
+
+def run(number=200, threads=10):
+    django.setup()
+
+    from lite_forms.views import AsyncSingleFormView, SingleFormView
+
+    api = start_stub_api()
+    results = [
+        (
+            f"SingleFormView ({threads} threads)",
+            lambda: run_threaded(build_view(SingleFormView, sync_action(*api)), number, threads),
+        ),
+        (
+            "AsyncSingleFormView (async action)",
+            lambda: run_async(build_view(AsyncSingleFormView, async_action(*api)), number),
+        ),
+        (
+            "AsyncSingleFormView (sync action)",
+            lambda: run_async(build_view(AsyncSingleFormView, sync_action(*api)), number),
+        ),
+    ]
+
+    print(f"{number} submissions, with the API responding after {DELAY * 1000:.0f}ms")
+    for name, function in results:
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        print(f"{name:<40} {seconds:>6.2f}s {number / seconds:>8.0f} submissions/s")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,67 @@
+"""
+Compares building a 50,000 entry tree with convert_list_to_tree and CompactTree.from_list,
+in time and memory
+
+python -m lite_forms.benchmarks.compact_tree
+"""
+import timeit
+import tracemalloc
+
+from lite_forms.helpers import convert_list_to_tree
+from lite_forms.trees import CompactTree
+
+
+def build_items(size=50000, branching=10):
+    """
+    Builds a control list shaped list of items, as convert_list_to_tree takes, of roughly the given size
+    """
+    count = 0
+
+    def build(prefix, depth):
+        nonlocal count
+        items = []
+        for index in range(branching):
+            if count >= size:
+                break
+            count += 1
+            key = f"{prefix}{index}"
+            item = {"key": key, "value": f"Entry {key}"}
+            if depth:
+                item["children"] = build(key + ".", depth - 1)
+            items.append(item)
+        return items
+
+    return build("ML", 4)
+
+
+def measure(build):
+    tracemalloc.start()
+    tree = build()  # noqa
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def run(number=5):
+    items = build_items()
+
+    results = [
+        (
+            "convert_list_to_tree",
+            timeit.timeit(lambda: convert_list_to_tree(items), number=number),
+            measure(lambda: convert_list_to_tree(items)),
+        ),
+        (
+            "CompactTree.from_list",
+            timeit.timeit(lambda: CompactTree.from_list(items), number=number),
+            measure(lambda: CompactTree.from_list(items)),
+        ),
+    ]
+
+    print(f"50,000 entries, {number} runs")
+    for name, seconds, size in results:
+        print(f"{name:<25} {seconds / number * 1000:>8.1f}ms per build {size / 1024 / 1024:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,47 @@
+"""
+Compares the memory used by, and time taken to deepcopy, a form with 5,000 options
+built from slotted Options and from Options with a __dict__ (as they were previously)
+
+python -m lite_forms.benchmarks.components_memory
+"""
+import copy
+import timeit
+import tracemalloc
+
+from lite_forms.components import Form, Checkboxes, Option, HiddenField, _Markdown
+
+# The same Option, but without __slots__
+PreviousOption = type("PreviousOption", (), {"__init__": Option.__init__, "description": _Markdown()})
+PreviousHiddenField = type("PreviousHiddenField", (), {"__init__": HiddenField.__init__})
+
+
+def build_form(option_class=Option, hidden_field_class=HiddenField, size=5000):
+    options = [option_class(f"key-{index}", f"Option {index}", description="") for index in range(size)]
+    hidden_fields = [hidden_field_class(f"field-{index}", "value") for index in range(size // 10)]
+    return Form("Pick some options", questions=[*hidden_fields, Checkboxes("options[]", options=options)])
+
+
+def measure(build):
+    tracemalloc.start()
+    form = build()  # noqa
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def run(number=5):
+    results = []
+    for name, build in [
+        ("__dict__", lambda: build_form(PreviousOption, PreviousHiddenField)),
+        ("__slots__", build_form),
+    ]:
+        form = build()
+        results.append((name, measure(build), timeit.timeit(lambda: copy.deepcopy(form), number=number)))
+
+    print(f"5,000 options and 500 hidden fields, {number} deepcopies")
+    for name, size, seconds in results:
+        print(f"{name:<10} {size / 1024 / 1024:>6.2f}MB {seconds / number * 1000:>8.1f}ms per deepcopy")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,78 @@
+"""
+Compares nest_data and flatten_data with their previous, recursive implementations
+over a realistic 500 key payload
+
+python -m lite_forms.benchmarks.nest_flatten
+"""
+import timeit
+from collections.abc import MutableMapping
+
+from lite_forms.helpers import nest_data, flatten_data
+
+
+def previous_nest_data(sent_data):
+    def _create_keys(d, keys, value):
+        keys = keys.split(".")
+        for k in keys[:-1]:
+            if k not in d:
+                d[k] = {}
+            d = d[k]
+        d[keys[-1]] = value
+
+    data = {}
+
+    for q, v in sent_data.items():
+        _create_keys(data, q, v)
+
+    return data
+
+
+def previous_flatten_data(d, parent_key="", sep="."):
+    items = []
+    for k, v in d.items():
+        new_key = parent_key + sep + k if parent_key else k
+        if isinstance(v, MutableMapping):
+            items.extend(previous_flatten_data(v, new_key, sep=sep).items())
+        else:
+            items.append((new_key, v))
+    return dict(items)
+
+
+def build_payload(size=500):
+    """
+    Builds flat POST data shaped like an application: top level answers, addresses, sites and goods
+    """
+    payload = {}
+    index = 0
+    while len(payload) < size:
+        payload[f"question_{index}"] = "Yes"
+        payload[f"end_user.address.line_{index}"] = "1 Example Street"
+        payload[f"sites.site_{index}.name"] = f"Site {index}"
+        payload[f"sites.site_{index}.address.postcode"] = "AB1 2CD"
+        payload[f"goods.good_{index}.control_list_entries"] = ["ML1a", "ML2b"]
+        index += 1
+    return dict(list(payload.items())[:size])
+
+
+def run(number=2000):
+    flat = build_payload()
+    nested = nest_data(flat)
+    assert nested == previous_nest_data(flat)
+    assert flatten_data(nested) == previous_flatten_data(nested)
+
+    cache = {}
+    results = [
+        ("nest_data (previous)", timeit.timeit(lambda: previous_nest_data(flat), number=number)),
+        ("nest_data", timeit.timeit(lambda: nest_data(flat), number=number)),
+        ("flatten_data (previous)", timeit.timeit(lambda: previous_flatten_data(nested), number=number)),
+        ("flatten_data", timeit.timeit(lambda: flatten_data(nested), number=number)),
+        ("flatten_data (cached)", timeit.timeit(lambda: flatten_data(nested, cache=cache), number=number)),
+    ]
+
+    print(f"{len(flat)} keys, {number} runs")
+    for name, seconds in results:
+        print(f"{name:<25} {seconds / number * 1000000:>8.1f}µs per call")
+
+
+if __name__ == "__main__":
+    run()
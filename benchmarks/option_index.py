@@ -0,0 +1,47 @@
+"""
+Compares looking up, searching and checking the selection of 10,000 options by scanning them and with an OptionIndex
+
+DJANGO_SETTINGS_MODULE=conf.settings python -m lite_forms.benchmarks.option_index
+"""
+import timeit
+
+from lite_forms.components import Option
+from lite_forms.options import OptionIndex, Selection, index_options
+from lite_forms.templatetags.custom_tags import key_in_array
+
+
+def build_options(size=10000):
+    return [Option(f"key-{index}", f"Organisation {index} Limited") for index in range(size)]
+
+
+def check_selection(options, selected):
+    selection = Selection(selected)
+    return [option.key in selection for option in options]
+
+
+def run(number=20):
+    options = build_options()
+    selected = [f"key-{index}" for index in range(0, len(options), 200)]
+    index = OptionIndex(options)
+
+    results = [
+        ("Index options", lambda: OptionIndex(options)),
+        ("Index options (cached)", lambda: index_options(options)),
+        ("Get by key (scan)", lambda: next(option for option in options if option.key == "key-9999")),
+        ("Get by key (index)", lambda: index.get("key-9999")),
+        ("Prefix search (scan)", lambda: [o for o in options if o.value.lower().startswith("organisation 99")][:10]),
+        ("Prefix search (index)", lambda: index.prefix_search("organisation 99", 10)),
+        ("Token search (scan)", lambda: [o for o in options if "999" in o.value.lower().split()][:10]),
+        ("Token search (index)", lambda: index.token_search("999", 10)),
+        ("Check selection (scan)", lambda: [key_in_array(selected, option.key) for option in options]),
+        ("Check selection (set)", lambda: check_selection(options, selected)),
+    ]
+
+    print(f"{len(options):,} options, {number} runs")
+    for name, function in results:
+        seconds = timeit.timeit(function, number=number)
+        print(f"{name:<25} {seconds / number * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    run()
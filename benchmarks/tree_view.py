@@ -0,0 +1,67 @@
+"""
+Compares rendering a 10,000 node TreeView with the recursive components/node.html template
+and with the iterative renderers.render_tree
+
+Run from a project using lite_forms, with DJANGO_SETTINGS_MODULE set:
+python -m lite_forms.benchmarks.tree_view
+"""
+import timeit
+
+import django
+
+
+def build_tree(size=10000, branching=10):
+    """
+    Builds a control list shaped tree of roughly the given size, with the given number of children per node
+    """
+    from lite_forms.helpers import convert_list_to_tree
+
+    count = 0
+
+    def build(prefix, depth):
+        nonlocal count
+        items = []
+        for index in range(branching):
+            if count >= size:
+                break
+            count += 1
+            key = f"{prefix}{index}"
+            item = {"key": key, "value": f"Entry {key}"}
+            if depth:
+                item["children"] = build(key + ".", depth - 1)
+            items.append(item)
+        return items
+
+    return convert_list_to_tree(build("ML", 3))
+
+
+def run(number=5):
+    django.setup()
+
+    from django.template import Context
+    from django.template.loader import get_template
+
+    from lite_forms.components import TreeView
+    from lite_forms.renderers import render_tree
+
+    tree_view = TreeView("control_list_entries", build_tree())
+    selected = ["ML0.0.0.0", "ML5.5.5", "ML9"]
+    template = get_template("components/node.html").template
+    context = {"data": selected, "tree_data": tree_view.data, "component": tree_view}
+
+    results = [
+        ("node.html", timeit.timeit(lambda: template.render(Context(context)), number=number)),
+        ("render_tree", timeit.timeit(lambda: render_tree(tree_view.name, tree_view.data, selected), number=number)),
+        (
+            "render_tree (skip collapsed)",
+            timeit.timeit(lambda: render_tree(tree_view.name, tree_view.data, selected, True), number=number),
+        ),
+    ]
+
+    print(f"10,000 nodes, {number} runs")
+    for name, seconds in results:
+        print(f"{name:<30} {seconds / number * 1000:>8.1f}ms per render")
+
+
+if __name__ == "__main__":
+    run()
@@ -1,12 +1,26 @@
 from lite_forms.components import TextInput, AutocompleteInput, TextArea, TokenBar
 from lite_forms.helpers import conditional
+from lite_forms.options import OptionSet
+
+
+def shared_options(options):
+    """
+    Returns options as a shared OptionSet - options can be a list of Options, an OptionSet, or ReferenceOptions
+    (or another function returning options)
+    """
+    if options is None:
+        return None
+    if callable(options):
+        options = options()
+    return OptionSet(options)
 
 
 def country_question(countries, prefix="address."):
-    return AutocompleteInput(title="Country", name=prefix + "country", options=countries)
+    return AutocompleteInput(title="Country", name=prefix + "country", options=shared_options(countries))
 
 
 def address_questions(countries, prefix="address."):
+    countries = shared_options(countries)
     return [
         TextInput(title="Building and street", accessible_description="line 1 of 2", name=prefix + "address_line_1",),
         TextInput(title="", accessible_description="line 2 of 2", name=prefix + "address_line_2",),
@@ -18,6 +32,7 @@ def address_questions(countries, prefix="address."):
 
 
 def foreign_address_questions(countries, prefix="address."):
+    countries = shared_options(countries)
     return [
         TextArea(title="Address", name=prefix + "address", classes=["govuk-input--width-20"], rows=6),
         conditional(countries, country_question(countries, prefix)),
@@ -30,10 +45,10 @@ def control_list_entries_question(
     description="Type to get suggestions. For example, ML1a.",
     name="control_list_entries",
 ):
-    return TokenBar(title=title, name=name, description=description, options=control_list_entries,)
+    return TokenBar(title=title, name=name, description=description, options=shared_options(control_list_entries),)
 
 
 def pv_grading_question(
     pv_gradings, title="PV grading", description="For example, UK OFFICIAL-SENSITIVE", name="pv_grading",
 ):
-    return AutocompleteInput(title=title, name=name, description=description, options=pv_gradings)
+    return AutocompleteInput(title=title, name=name, description=description, options=shared_options(pv_gradings))
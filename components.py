@@ -1,14 +1,99 @@
+from copy import deepcopy
 from enum import Enum
-from typing import List, Optional, Dict, Set
+from typing import List, Optional, Dict, Set, Mapping, NamedTuple
 
 from lite_forms.styles import ButtonStyle
 
 
-class _Component:
+class _Markdown:
+    """
+    Stores markdown as it's given and only converts it to HTML the first time it's read,
+    caching the result on the instance - only for internal use
+    """
+
+    def __set_name__(self, owner, name):
+        self.raw_name = f"_{name}"
+        self.html_name = f"_{name}_html"
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        try:
+            return getattr(instance, self.html_name)
+        except AttributeError:
+            from lite_forms.helpers import convert_to_markdown
+
+            html = convert_to_markdown(getattr(instance, self.raw_name, None))
+            setattr(instance, self.html_name, html)
+            return html
+
+    def __set__(self, instance, value):
+        setattr(instance, self.raw_name, value)
+        try:
+            delattr(instance, self.html_name)
+        except AttributeError:
+            pass
+
+
+_ATOMIC_TYPES = (str, int, float, bool, type(None))
+_slot_descriptors = {}
+
+
+class _Slotted:
+    """
+    Base for components, which use __slots__ rather than a __dict__ to save memory - only for internal use
+    Containers (such as Form) have a __dict__ as well, so that projects can still set their own attributes on them
+    """
+
+    __slots__ = ()
+
+    # Slots left unset on copies, such as caches which belong to the original
+    _uncopied = ()
+
+    def __deepcopy__(self, memo):
+        # Copies slots directly, which is much quicker than copy's default handling of slotted objects
+        cls = type(self)
+        descriptors = _slot_descriptors.get(cls)
+        if descriptors is None:
+            names = [name for klass in reversed(cls.__mro__) for name in getattr(klass, "__slots__", ())]
+            names = [name for name in names if name not in cls._uncopied and name != "__dict__"]
+            descriptors = _slot_descriptors[cls] = [getattr(cls, name) for name in names]
+
+        result = cls.__new__(cls)
+        memo[id(self)] = result
+        for descriptor in descriptors:
+            try:
+                value = descriptor.__get__(self, cls)
+            except AttributeError:
+                continue
+            descriptor.__set__(result, value if type(value) in _ATOMIC_TYPES else deepcopy(value, memo))
+        state = getattr(self, "__dict__", None)
+        if state:
+            result.__dict__.update(deepcopy(state, memo))
+        return result
+
+
+class _Component(_Slotted):
     """
     Base component for LITE forms - only for internal use
     """
 
+    __slots__ = (
+        "name",
+        "title",
+        "_description",
+        "_description_html",
+        "short_title",
+        "accessible_description",
+        "optional",
+        "classes",
+        "extras",
+        "input_type",
+    )
+
+    description = _Markdown()
+
     def __init__(
         self,
         name: str,
@@ -20,11 +105,9 @@ class _Component:
         classes: Optional[List] = None,
         extras=None,
     ):
-        from lite_forms.helpers import convert_to_markdown
-
         self.name = name
         self.title = title
-        self.description = convert_to_markdown(description)
+        self.description = description
         self.short_title = short_title or title
         self.accessible_description = accessible_description
         self.optional = optional
@@ -32,7 +115,32 @@ class _Component:
         self.extras = extras
 
 
-class Button:
+class _Options:
+    """
+    Mixin for components with a list of Options - only for internal use
+    """
+
+    __slots__ = ()
+
+    @property
+    def option_index(self):
+        """
+        An OptionIndex of the component's options, shared by components with the same options
+        """
+        from lite_forms.options import get_option_index, index_options
+
+        if getattr(self, "remote", False):
+            try:
+                return get_option_index(self.search_id)
+            except KeyError:
+                if self.options is None:
+                    raise
+        return index_options(self.options)
+
+
+class Button(_Slotted):
+    __slots__ = ("value", "action", "style", "link", "id", "float_right")
+
     def __init__(
         self, value, action, style=ButtonStyle.DEFAULT, id=None, link=None, float_right=False,
     ):
@@ -47,68 +155,138 @@ class Button:
         self.float_right = float_right
 
 
-class BackLink:
+class BackLink(_Slotted):
+    __slots__ = ("text", "url")
+
     def __init__(self, text="Back", url="#"):
         self.text = text
         self.url = url
 
 
-class Breadcrumbs:
+class Breadcrumbs(_Slotted):
+    __slots__ = ("back_links", "__dict__")
+
     def __init__(self, back_links: List[BackLink]):  # noqa
         self.back_links = back_links
 
 
-class FormGroup:
+class FormGroup(_Slotted):
     """
     Container for multiple forms
     Automatically adds IDs to all forms to make it easier to reference them
     """
 
+    __slots__ = ("_forms", "_visible_forms", "_pk_index", "show_progress_indicators", "__dict__")
+
     def __init__(self, forms: list, show_progress_indicators=False):
-        self._forms = forms
+        self.forms = forms
         self.show_progress_indicators = show_progress_indicators
 
         self.update_progress_indicators()
         self.update_pks()
 
     def get_forms(self):
-        return [x for x in self._forms if x is not None]
+        # A new list each time, so changing it doesn't leave the group's pk index out of date
+        return list(self._visible_forms)
 
     def set_forms(self, value):
         self._forms = value
+        self._visible_forms = tuple(x.form if isinstance(x, FormSchema) else x for x in value if x is not None)
+        self._pk_index = None
 
     forms = property(get_forms, set_forms)
 
+    def get_form_index(self, pk):
+        """
+        Returns the position of the form with the given pk in forms, or None if there isn't one
+        """
+        if self._pk_index is None:
+            self._pk_index = {str(form.pk): index for index, form in enumerate(self._visible_forms)}
+
+        return self._pk_index.get(str(pk))
+
+    def get_form(self, pk, offset=0):
+        """
+        Returns the form offset places after the form with the given pk, or None if there isn't one
+        """
+        index = self.get_form_index(pk)
+        if index is not None and 0 <= index + offset < len(self._visible_forms):
+            return self._visible_forms[index + offset]
+
     def update_progress_indicators(self):
         index = 0
         if self.show_progress_indicators:
-            for form in self.forms:
+            total = len(self._visible_forms)
+            for form in self._visible_forms:
                 if form:
-                    form.caption = f"Step {index + 1} of {len(self.forms)}"
+                    form.caption = f"Step {index + 1} of {total}"
                     index += 1
 
     def update_pks(self):
         index = 0
-        for form in self.forms:
+        for form in self._visible_forms:
             if form:
                 form.pk = index
-                form.questions.append(HiddenField(name="form_pk", value=form.pk))
+                # Forms can be shared between groups (and requests), so only add their form_pk field once
+                form_pk = next((x for x in form.questions if isinstance(x, HiddenField) and x.name == "form_pk"), None)
+                if form_pk:
+                    form_pk.value = form.pk
+                else:
+                    form.questions.append(HiddenField(name="form_pk", value=form.pk))
                 index += 1
+        self._pk_index = None
+
+
+class Label(_Slotted):
+    __slots__ = ("id", "_text", "_text_html", "classes", "input_type")
 
+    text = _Markdown()
 
-class Label:
     def __init__(
         self, text: str, id: str = None, classes: Optional[List] = None,
     ):
-        from lite_forms.helpers import convert_to_markdown
-
         self.id = id
-        self.text = convert_to_markdown(text)
+        self.text = text
         self.classes = classes
         self.input_type = "label"
 
 
-class Form:
+class Form(_Slotted):
+    __slots__ = (
+        "title",
+        "_description",
+        "_description_html",
+        "_questions",
+        "caption",
+        "helpers",
+        "footer_label",
+        "buttons",
+        "back_link",
+        "javascript_imports",
+        "post_url",
+        "single_form_element",
+        "container",
+        "fast_render",
+        "pk",
+        "_schema",
+        "__dict__",
+    )
+
+    # A copy's questions are new objects, so it's compiled again rather than sharing the original's schema
+    _uncopied = ("_schema",)
+
+    description = _Markdown()
+
+    def get_questions(self):
+        return self._questions
+
+    def set_questions(self, value):
+        self._questions = value
+        # The form's fields have changed, so it needs compiling again
+        self._schema = None
+
+    questions = property(get_questions, set_questions)
+
     def __init__(
         self,
         title=None,
@@ -124,11 +302,12 @@ class Form:
         back_link=BackLink(),
         post_url=None,
         container: str = "two-pane",
+        fast_render: Optional[bool] = None,
     ):
-        from lite_forms.helpers import convert_to_markdown, heading_used_as_label
+        from lite_forms.helpers import heading_used_as_label
 
         self.title = title
-        self.description = convert_to_markdown(description)
+        self.description = description
         self.questions = questions
         self.caption = caption
         self.helpers = helpers
@@ -141,6 +320,7 @@ class Form:
         self.post_url = post_url
         self.single_form_element = heading_used_as_label(questions)
         self.container = container
+        self.fast_render = fast_render
         from lite_forms.helpers import get_all_form_components
 
         if self.questions:
@@ -149,45 +329,116 @@ class Form:
                     self.javascript_imports.add(item)
 
 
-class DetailComponent:
-    def __init__(self, title, description="", components=None):
-        from lite_forms.helpers import convert_to_markdown
+class FormSchema(NamedTuple):
+    """
+    Frozen, precompiled structure of a Form - see helpers.compile_form
+    """
+
+    form: Form
+    question_count: int
+    components: tuple
+    component_index: Mapping
+    error_fields: Mapping
+    list_fields: frozenset
+    date_prefixes: tuple
+    javascript_imports: frozenset
+    single_form_element: Optional[object]
+
+
+class FormOverlay(Form):
+    """
+    Request scoped, copy on write view of a shared Form - see helpers.copy_form
+    Reads fall through to the original form, while writes (and changes to its questions and buttons,
+    which are copied the first time they're read) only affect the overlay
+    The components in its questions are still shared, so they must be replaced rather than changed
+    """
+
+    __slots__ = ("_form",)
+
+    _copied_on_read = ("_questions", "buttons")
+
+    def __init__(self, form: Form):  # noqa
+        self._form = form
+        # Overlays use the original form's schema until their questions are copied
+        self._schema = None
+
+    def has_own(self, name):
+        """
+        Returns whether an attribute has been set on the overlay, rather than falling through to the original form
+        """
+        try:
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return False
+        return True
+
+    @property
+    def __class__(self):
+        # Reports the wrapped form's class, so that templates (eg the classname filter) see the original form
+        return type(self._form)
+
+    def __getattr__(self, name):
+        if name == "_form":
+            raise AttributeError(name)
+
+        value = getattr(self._form, name)
+        if name in self._copied_on_read and value is not None:
+            value = list(value)
+            setattr(self, name, value)
+        return value
+
 
+class DetailComponent(_Slotted):
+    __slots__ = ("title", "_description", "_description_html", "components", "input_type", "__dict__")
+
+    description = _Markdown()
+
+    def __init__(self, title, description="", components=None):
         self.title = title
-        self.description = convert_to_markdown(description)
+        self.description = description
         self.components = components
         self.input_type = "detail"
 
 
-class HiddenField:
+class HiddenField(_Slotted):
+    __slots__ = ("name", "value", "input_type")
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
         self.input_type = "hidden"
 
 
-class HelpSection:
-    def __init__(self, title, description, includes=None):
-        from lite_forms.helpers import convert_to_markdown
+class HelpSection(_Slotted):
+    __slots__ = ("title", "_description", "_description_html", "includes", "__dict__")
 
+    description = _Markdown()
+
+    def __init__(self, title, description, includes=None):
         self.title = title
-        self.description = convert_to_markdown(description)
+        self.description = description
         self.includes = includes
 
 
-class HTMLBlock:
+class HTMLBlock(_Slotted):
+    __slots__ = ("html", "input_type")
+
     def __init__(self, html):
         self.html = html
         self.input_type = "html_block"
 
 
-class SideBySideSection:
+class SideBySideSection(_Slotted):
+    __slots__ = ("input_type", "questions", "__dict__")
+
     def __init__(self, questions):
         self.input_type = "side_by_side"
         self.questions = questions
 
 
 class TextInput(_Component):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -203,6 +454,8 @@ class TextInput(_Component):
 
 
 class EmailInput(_Component):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -218,6 +471,8 @@ class EmailInput(_Component):
 
 
 class NumberInput(_Component):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -232,6 +487,8 @@ class NumberInput(_Component):
 
 
 class QuantityInput(_Component):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -246,6 +503,8 @@ class QuantityInput(_Component):
 
 
 class CurrencyInput(_Component):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -259,13 +518,15 @@ class CurrencyInput(_Component):
         self.input_type = "currency_input"
 
 
-class Checkboxes(_Component):
+class Checkboxes(_Options, _Component):
     """
     Displays checkboxes on the page
     Add Option components to the options array to show checkboxes
     Add optional classes such as 'govuk-checkboxes--inline' or 'govuk-checkboxes--small'
     """
 
+    __slots__ = ("options", "empty_notice", "show_select_links", "javascript_imports")
+
     def __init__(
         self,
         name: str,
@@ -298,13 +559,15 @@ class Checkboxes(_Component):
             self.javascript_imports.append("/javascripts/filter-checkbox-list.js")
 
 
-class RadioButtons(_Component):
+class RadioButtons(_Options, _Component):
     """
     Displays radiobuttons on the page
     Add Option components to the options array to show radiobuttons
     Add optional classes such as 'lite-radios--inline' or 'govuk-radios--small'
     """
 
+    __slots__ = ("options", "empty_notice", "javascript_imports")
+
     def __init__(
         self,
         name: str,
@@ -334,6 +597,8 @@ class RadioButtonsImage(RadioButtons):
     Add optional classes such as 'lite-radiobuttons--inline' or 'govuk-radiobuttons--small'
     """
 
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -349,7 +614,9 @@ class RadioButtonsImage(RadioButtons):
         self.input_type = "radiobuttons_image"
 
 
-class Select(_Component):
+class Select(_Options, _Component):
+    __slots__ = ("options", "include_default_select")
+
     def __init__(
         self,
         name: str,
@@ -367,7 +634,26 @@ class Select(_Component):
         self.include_default_select = include_default_select
 
 
-class Option:
+class Option(_Slotted):
+    __slots__ = (
+        "auto_check",
+        "key",
+        "value",
+        "_description",
+        "_description_html",
+        "show_or",
+        "img_url",
+        "components",
+        "data_attribute",
+        "classes",
+        "more_information",
+        "tag",
+        "disabled",
+        "id",
+    )
+
+    description = _Markdown()
+
     def __init__(
         self,
         key,
@@ -384,12 +670,10 @@ class Option:
         disabled: bool = False,
         id=None,
     ):
-        from lite_forms.helpers import convert_to_markdown
-
         self.auto_check = auto_check
         self.key = key
         self.value = value
-        self.description = convert_to_markdown(description)
+        self.description = description
         self.show_or = show_or
         self.img_url = img_url
         self.components = [component for component in components if component] if components else []
@@ -401,22 +685,26 @@ class Option:
         self.id = id
 
 
-class Group:
+class Group(_Slotted):
     """
     Groups components together inside of a div
     """
 
+    __slots__ = ("input_type", "components", "classes", "__dict__")
+
     def __init__(self, components, classes=None):
         self.input_type = "group"
         self.components = components
         self.classes = classes
 
 
-class Filter:
+class Filter(_Slotted):
     """
     Filters a list of checkboxes based on title and description
     """
 
+    __slots__ = ("placeholder", "input_type")
+
     def __init__(self, placeholder: str = "Filter"):
         """
         :type placeholder: Sets the placeholder text on the input field
@@ -425,7 +713,9 @@ class Filter:
         self.input_type = "filter"
 
 
-class Heading:
+class Heading(_Slotted):
+    __slots__ = ("text", "heading_style", "input_type")
+
     def __init__(self, text, heading_style):
         self.text = text
         self.heading_style = heading_style
@@ -433,6 +723,8 @@ class Heading:
 
 
 class FileUpload(_Component):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str = "file",
@@ -454,6 +746,8 @@ class FileUpload(_Component):
 
 
 class MultiFileUpload(_Component):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -475,6 +769,8 @@ class MultiFileUpload(_Component):
 
 
 class TextArea(_Component):
+    __slots__ = ("rows", "data_attributes")
+
     def __init__(
         self,
         name: str,
@@ -504,6 +800,8 @@ class TextArea(_Component):
 
 
 class MarkdownArea(TextArea):
+    __slots__ = ()
+
     def __init__(
         self,
         name: str,
@@ -518,7 +816,23 @@ class MarkdownArea(TextArea):
         self.input_type = "markdown"
 
 
-class DateInput:
+class DateInput(_Slotted):
+    __slots__ = (
+        "prefix",
+        "title",
+        "_description",
+        "_description_html",
+        "name",
+        "optional",
+        "classes",
+        "extras",
+        "input_type",
+        "short_title",
+        "inline_title",
+    )
+
+    description = _Markdown()
+
     def __init__(
         self,
         prefix: str,
@@ -531,11 +845,9 @@ class DateInput:
         classes: Optional[List] = None,
         extras: Optional[List] = None,
     ):
-        from lite_forms.helpers import convert_to_markdown
-
         self.prefix = prefix
         self.title = title
-        self.description = convert_to_markdown(description)
+        self.description = description
         self.name = name
         self.optional = optional
         self.classes = classes
@@ -545,7 +857,9 @@ class DateInput:
         self.inline_title = inline_title
 
 
-class Summary:
+class Summary(_Slotted):
+    __slots__ = ("values", "classes", "extras", "input_type")
+
     def __init__(self, values: dict = None, classes: Optional[List] = None, extras: Optional[List] = None):
         self.values = values
         self.classes = classes
@@ -553,23 +867,67 @@ class Summary:
         self.input_type = "summary"
 
 
-class TreeNode:
+class TreeNode(_Slotted):
+    __slots__ = ("key", "value", "children")
+
     def __init__(self, key, value, children=None):
         self.key = key
         self.value = value
         self.children = children if children else []
 
 
-class TreeView:
-    def __init__(self, name, data: List, title="", short_title=""):
+class TreeView(_Slotted):
+    __slots__ = (
+        "title",
+        "short_title",
+        "name",
+        "data",
+        "skip_collapsed",
+        "lazy_depth",
+        "tree_id",
+        "children_url",
+        "input_type",
+    )
+
+    def __init__(
+        self,
+        name,
+        data: List,
+        title="",
+        short_title="",
+        skip_collapsed=False,
+        lazy_depth: Optional[int] = None,
+        tree_id: Optional[str] = None,
+        children_url: Optional[str] = None,
+    ):
+        """
+        If lazy_depth is set, only that many levels of the tree are rendered (as well as any selected nodes),
+        with deeper levels loaded from children_url (TreeChildrenView by default) when they're expanded
+        data can be a list of TreeNodes or a CompactTree
+        """
+        from lite_forms.trees import CompactTree, register_tree, tree_fingerprint
+
         self.title = title
         self.short_title = short_title or title
         self.name = name
-        self.data = TreeNode("", "", data)
+        self.data = data.root if isinstance(data, CompactTree) else TreeNode("", "", data)
+        self.skip_collapsed = skip_collapsed
+        self.lazy_depth = lazy_depth
+        self.tree_id = tree_id
+        self.children_url = children_url
         self.input_type = "tree-view"
 
+        if lazy_depth is not None:
+            # Trees are registered by their content (unless they're given an id), so that trees with different
+            # content (such as for different users) are never served in place of each other
+            fingerprint = tree_fingerprint(self.data)
+            self.tree_id = tree_id or fingerprint
+            register_tree(self.tree_id, self.data, fingerprint=fingerprint)
+
+
+class List(_Slotted):
+    __slots__ = ("items", "title", "type", "classes", "input_type", "__dict__")
 
-class List:
     class ListType(Enum):
         DEFAULT = 1
         BULLETED = 2
@@ -585,7 +943,26 @@ class List:
         self.input_type = "list"
 
 
-class TokenBar:
+class TokenBar(_Options, _Slotted):
+    __slots__ = (
+        "name",
+        "title",
+        "_description",
+        "_description_html",
+        "options",
+        "optional",
+        "classes",
+        "input_type",
+        "javascript_imports",
+        "remote",
+        "search_id",
+        "search_url",
+        "debounce",
+        "limit",
+    )
+
+    description = _Markdown()
+
     def __init__(
         self,
         name: str,
@@ -594,25 +971,47 @@ class TokenBar:
         description: str = "",
         optional: bool = False,
         classes: [] = None,
+        remote: bool = False,
+        search_id: Optional[str] = None,
+        search_url: Optional[str] = None,
+        debounce: int = 300,
+        limit: int = 10,
     ):
         """
         TokenBar allows for input of complex pieces of information in compact form,
         such as an entity (person, place, or thing) or text. They enable user input and
         verify that input by converting text into chips.
+        If remote is set, options aren't rendered into the page - they're searched as the user types
+        (debounce milliseconds after they stop) from search_url (OptionSearchView by default)
         """
-        from lite_forms.helpers import convert_to_markdown
-
         self.name = name
         self.title = title
-        self.description = convert_to_markdown(description)
+        self.description = description
         self.options = options
         self.optional = optional
         self.classes = classes if classes else ["tokenfield-container"]
         self.input_type = "token-bar"
         self.javascript_imports = ["/javascripts/tokenfield.min.js"]
+        _set_remote(self, remote, search_id, search_url, debounce, limit)
+
+
+class AutocompleteInput(_Options, _Slotted):
+    __slots__ = (
+        "name",
+        "title",
+        "description",
+        "options",
+        "classes",
+        "deferred",
+        "input_type",
+        "javascript_imports",
+        "remote",
+        "search_id",
+        "search_url",
+        "debounce",
+        "limit",
+    )
 
-
-class AutocompleteInput:
     def __init__(
         self,
         name: str,
@@ -621,7 +1020,16 @@ class AutocompleteInput:
         description: str = "",
         classes: Optional[List] = None,
         deferred: bool = False,
+        remote: bool = False,
+        search_id: Optional[str] = None,
+        search_url: Optional[str] = None,
+        debounce: int = 300,
+        limit: int = 10,
     ):
+        """
+        If remote is set, only the selected option is rendered into the page - the rest are searched as the user
+        types (debounce milliseconds after they stop) from search_url (OptionSearchView by default)
+        """
         self.name = name
         self.title = title
         self.description = description
@@ -630,9 +1038,34 @@ class AutocompleteInput:
         self.deferred = deferred
         self.input_type = "autocomplete"
         self.javascript_imports = ["/javascripts/accessible-autocomplete.min.js"]
+        _set_remote(self, remote, search_id, search_url, debounce, limit)
+
 
+def _set_remote(component, remote, search_id, search_url, debounce, limit):
+    """
+    Sets up an AutocompleteInput or TokenBar's remote option search, registering its options for OptionSearchView
+    options can be a list of Options or a function returning one, which is called when first searched
+    Without options, the options registered under search_id (or the component's name) are searched
+    """
+    from lite_forms.options import options_fingerprint, register_options
+
+    component.remote = remote
+    component.search_id = search_id or component.name
+    component.search_url = search_url
+    component.debounce = debounce
+    component.limit = limit
+
+    if remote and component.options is not None and not search_url:
+        # Options are registered by their content (unless they're given an id), so that different options
+        # (such as for different users, or forms with the same field name) are never searched in place of each other
+        fingerprint = options_fingerprint(component.options)
+        component.search_id = search_id or fingerprint
+        register_options(component.search_id, component.options, fingerprint=fingerprint)
+
+
+class Link(_Slotted):
+    __slots__ = ("text", "address", "name", "classes", "form_action", "input_type")
 
-class Link:
     def __init__(
         self, text: str, address: str, name: str = None, classes: Optional[List] = None, form_action: bool = False
     ):
@@ -647,7 +1080,9 @@ class Link:
         return other.text == self.text and other.address == self.address
 
 
-class FiltersBar:
+class FiltersBar(_Slotted):
+    __slots__ = ("filters", "advanced_filters", "javascript_imports")
+
     def __init__(self, filters: List, advanced_filters: Optional[List] = None):
         self.filters = filters or []
         self.advanced_filters = advanced_filters or []
@@ -657,14 +1092,18 @@ class FiltersBar:
                 self.javascript_imports.add(item)
 
 
-class Custom:
+class Custom(_Slotted):
+    __slots__ = ("input_type", "data", "template")
+
     def __init__(self, template, data=None):
         self.input_type = "custom"
         self.data = data
         self.template = template
 
 
-class WarningBanner:
+class WarningBanner(_Slotted):
+    __slots__ = ("input_type", "id", "text")
+
     def __init__(self, id, text):
         self.input_type = "warning"
         self.id = id
@@ -5,16 +5,28 @@ from lite_forms.components import (
     Option,
     HiddenField,
     Form,
+    FormSchema,
     BackLink,
     Summary,
 )
 from lite_forms.helpers import conditional
+from lite_forms.renderers import (
+    FastRenderer,
+    use_fast_renderer,
+    use_streaming,
+    stream_template,
+    stream_template_chunks,
+)
 
 
-def form_page(request, form, data=None, errors=None, extra_data=None):
+def form_page(request, form, data=None, errors=None, extra_data=None, stream=None):
     """
     Returns a standard GOV.UK Design System styled form page.
+    If stream is set (or the LITE_FORMS_STREAMING setting is), the page is streamed a question at a time.
     """
+    if isinstance(form, FormSchema):
+        form = form.form
+
     context = {
         "page": form,
         "title": form.title if errors is None else "Error: " + form.title,
@@ -26,6 +38,15 @@ def form_page(request, form, data=None, errors=None, extra_data=None):
     if extra_data:
         context.update(extra_data)
 
+    if use_streaming(stream):
+
+        def render_questions(context):
+            if use_fast_renderer(form):
+                return FastRenderer(context, data, errors).stream(form.questions)
+            return stream_template_chunks(context, "form-question.html", "question", form.questions or ())
+
+        return stream_template(request, "form.html", context, render_questions)
+
     return render(request, "form.html", context)
 
 
@@ -40,9 +61,11 @@ def success_page(
     animated=False,
     back_link=None,
     additional_context=None,
+    stream=None,
 ):
     """
     Returns a standard GOV.UK Design System styled success page.
+    If stream is set (or the LITE_FORMS_STREAMING setting is), the page is sent before its includes are rendered.
     """
     if additional_context is None:
         additional_context = {}
@@ -59,6 +82,16 @@ def success_page(
     }
     if additional_context:
         context.update(additional_context)
+
+    if use_streaming(stream):
+
+        def render_includes(context):
+            if includes:
+                template = includes if hasattr(includes, "render") else context.template.engine.get_template(includes)
+                yield template.render(context)
+
+        return stream_template(request, "confirmation.html", context, render_includes)
+
     return render(request, "confirmation.html", context)
 
 
@@ -1,31 +1,47 @@
+import asyncio
 import copy
+import inspect
+import threading
+from collections import OrderedDict
 from collections.abc import MutableMapping
+from types import MappingProxyType
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from markdown import markdown
 
-from lite_forms.components import FormGroup, Form, HiddenField, TreeNode
+from lite_forms.components import FormGroup, Form, FormOverlay, FormSchema, HiddenField, TreeNode
+
+
+def copy_form(form: Form):
+    """
+    Returns a request scoped copy of a shared form - a deep copy, or a FormOverlay with the LITE_FORMS_FORM_OVERLAYS
+    setting, which is cheaper but only isolates the form's own attributes, questions and buttons
+    """
+    if getattr(settings, "LITE_FORMS_FORM_OVERLAYS", False):
+        return FormOverlay(form)
+    return copy.deepcopy(form)
 
 
 def get_form_by_pk(form_pk, form_group: FormGroup):
-    for form in form_group.forms:
-        if str(form.pk) == str(form_pk):
-            return copy.deepcopy(form)
+    form = form_group.get_form(form_pk)
+    if form is not None:
+        return copy_form(form)
 
 
 def get_previous_form(form_pk, form_group: FormGroup):
-    for form in form_group.forms:
-        # If the current form is the final form in the group
-        if int(form.pk) == int(form_pk) - 1:
-            return copy.deepcopy(form)
+    form = form_group.get_form(int(form_pk) - 1)
+    if form is not None:
+        return copy_form(form)
 
 
 def get_next_form(form_pk, form_group: FormGroup):
-    next_one = False
-    for form in form_group.forms:
-        if next_one:
-            return copy.deepcopy(form)
-        if str(form.pk) == str(form_pk):
-            next_one = True
+    form = form_group.get_form(form_pk, 1)
+    if form is not None:
+        return copy_form(form)
+
+
+_LIST_COMPONENTS = ("checkboxes", "tree-view")
 
 
 def remove_unused_errors(errors, form: Form):
@@ -43,17 +59,16 @@ def remove_unused_errors(errors, form: Form):
     if not errors:
         return {}
 
-    for component in get_all_form_components(form):
-        # we look at [:-2] since checkboxes are lists that are named like "field[]", and we don't have "[]" in the api
-        list_components = ["checkboxes", "tree-view"]
-        if (
-            hasattr(component, "input_type")
-            and component.input_type in list_components
-            and errors.get(component.name[:-2])
-        ):
-            cleaned_errors[component.name[:-2]] = errors.get(component.name[:-2])
-        elif hasattr(component, "name") and errors.get(component.name):
-            cleaned_errors[component.name] = errors.get(component.name)
+    # Each error is looked up in the form's fields, and kept in the order of the fields
+    error_fields = compile_form(form).error_fields
+    fields = []
+    for key, value in errors.items():
+        field = error_fields.get(key)
+        if value and field and not (field[1] and errors.get(field[1])):
+            fields.append((field[0], key))
+
+    for _, key in sorted(fields):
+        cleaned_errors[key] = errors[key]
 
     return cleaned_errors
 
@@ -71,24 +86,26 @@ def nest_data(sent_data):
         }
     }
     """
+    data = {}
 
-    def _create_keys(d, keys, value):
-        keys = keys.split(".")
+    for key, value in sent_data.items():
+        if "." not in key:
+            data[key] = value
+            continue
+
+        keys = key.split(".")
+        d = data
         for k in keys[:-1]:
-            if k not in d:
-                d[k] = {}
-            d = d[k]
+            child = d.get(k)
+            if child is None:
+                child = d[k] = {}
+            d = child
         d[keys[-1]] = value
 
-    data = {}
-
-    for q, v in sent_data.items():
-        _create_keys(data, q, v)
-
     return data
 
 
-def flatten_data(d, parent_key="", sep="."):
+def flatten_data(d, parent_key="", sep=".", cache=None):
     """
     Flattens dictionaries eg
     {
@@ -100,15 +117,34 @@ def flatten_data(d, parent_key="", sep="."):
     {
         'site.name': 'SITE1'
     }
+    Optionally pass a dictionary as cache to reuse the result when the same (unchanged) data is flattened again,
+    in which case the returned dictionary mustn't be changed
     """
-    items = []
-    for k, v in d.items():
-        new_key = parent_key + sep + k if parent_key else k
-        if isinstance(v, MutableMapping):
-            items.extend(flatten_data(v, new_key, sep=sep).items())
+    if cache is not None:
+        cache_key = (id(d), parent_key, sep)
+        cached = cache.get(cache_key)
+        # Check the data is the same object, as ids can be reused once an object has been garbage collected
+        if cached and cached[0] is d:
+            return cached[1]
+
+    items = {}
+    # Walk the dictionaries depth first with a stack of iterators, rather than recursing and merging results
+    stack = [(parent_key, iter(d.items()))]
+    while stack:
+        prefix, iterator = stack[-1]
+        for k, v in iterator:
+            new_key = prefix + sep + k if prefix else k
+            if isinstance(v, dict) or isinstance(v, MutableMapping):
+                stack.append((new_key, iter(v.items())))
+                break
+            items[new_key] = v
         else:
-            items.append((new_key, v))
-    return dict(items)
+            stack.pop()
+
+    if cache is not None:
+        cache[cache_key] = (d, items)
+
+    return items
 
 
 def conditional(condition: bool, obj, else_obj=None):
@@ -123,6 +159,9 @@ def conditional(condition: bool, obj, else_obj=None):
 
 
 def heading_used_as_label(components):
+    if isinstance(components, FormSchema):
+        return components.single_form_element
+
     single_input = None
 
     if components:
@@ -138,16 +177,89 @@ def heading_used_as_label(components):
     return single_input
 
 
+class MarkdownCache:
+    """
+    Thread safe, bounded LRU cache of converted markdown, keyed on the source text
+    """
+
+    def __init__(self, maxsize=1024):
+        self._maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value):
+        with self._lock:
+            self._maxsize = value
+            self._evict()
+
+    def _evict(self):
+        while len(self._items) > self._maxsize:
+            self._items.popitem(last=False)
+
+    def get(self, text):
+        with self._lock:
+            try:
+                html = self._items[text]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._items.move_to_end(text)
+                self.hits += 1
+                return html
+
+        # Convert outside of the lock so that slow conversions don't block other threads
+        html = _convert_to_markdown(text)
+
+        with self._lock:
+            self._items[text] = html
+            self._items.move_to_end(text)
+            self._evict()
+
+        return html
+
+    def warm(self, texts):
+        """
+        Converts and stores the given texts ahead of time, eg at startup
+        """
+        for text in texts:
+            if text:
+                self.get(str(text))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._items), "maxsize": self._maxsize}
+
+
+markdown_cache = MarkdownCache()
+
+
+def _convert_to_markdown(text):
+    text = "<br>".join([markdown(item.strip(), extensions=["nl2br"]) for item in text.split("\n\n")])
+    # Replace leading (<p>) & trailing (</p>) p tags as they are not needed
+    text = text.replace("<p>", "")
+    text = text.replace("</p>", "")
+    text = text.replace(
+        "<a", '<a class="govuk-link govuk-link--no-visited-state" rel="noreferrer noopener" target="_blank"'
+    )
+    return text
+
+
 def convert_to_markdown(text):
     if text:
-        text = "<br>".join([markdown(item.strip(), extensions=["nl2br"]) for item in text.split("\n\n")])
-        # Replace leading (<p>) & trailing (</p>) p tags as they are not needed
-        text = text.replace("<p>", "")
-        text = text.replace("</p>", "")
-        text = text.replace(
-            "<a", '<a class="govuk-link govuk-link--no-visited-state" rel="noreferrer noopener" target="_blank"'
-        )
-        return text
+        # Lazy translation strings are cast so that the cache is keyed on the text itself
+        return markdown_cache.get(str(text))
     else:
         return None
 
@@ -172,6 +284,9 @@ def handle_lists(data):
 
 
 def get_all_form_components(form: Form):
+    if isinstance(form, FormSchema):
+        return list(form.components)
+
     components = []
     for component in form.questions:
         if component and hasattr(component, "name"):
@@ -187,24 +302,188 @@ def get_all_form_components(form: Form):
     return components
 
 
+def compile_form(form: Form):
+    """
+    Compiles a form definition into a frozen FormSchema, which helpers and views accept in place of the form
+    Schemas are cached on their form, and can be created at module import eg
+    MY_FORM = compile_form(my_form())
+    Forms are compiled again after their questions are set or added to, but not after one is replaced in place
+    (see forget_compiled_form)
+    """
+    if isinstance(form, FormSchema):
+        return form
+
+    if isinstance(form, FormOverlay) and not form.has_own("_questions"):
+        form = form._form
+
+    # Adding questions to a form's list (such as hidden fields) changes its length, so the schema is compiled again
+    schema = getattr(form, "_schema", None)
+    if schema and schema.question_count == len(form.questions or ()):
+        return schema
+
+    components = tuple(get_all_form_components(form)) if form.questions else ()
+    component_index = {}
+    error_fields = {}
+    list_fields = set()
+    date_prefixes = []
+    for position, component in enumerate(components):
+        prefix = getattr(component, "prefix", None)
+        if prefix:
+            date_prefixes.append(prefix)
+            for part in ["day", "month", "year"]:
+                component_index[prefix + part] = component
+        if component.name:
+            component_index[component.name] = component
+            # Errors match names, and checkboxes and tree views without their "[]" (which is used in preference)
+            if getattr(component, "input_type", None) in _LIST_COMPONENTS:
+                error_fields.setdefault(component.name[:-2], (position, None))
+                error_fields.setdefault(component.name, (position, component.name[:-2]))
+            else:
+                error_fields.setdefault(component.name, (position, None))
+            # Lists are named like "field[]", and we don't have "[]" in the api
+            if component.name.endswith("[]"):
+                component_index[component.name[:-2]] = component
+                list_fields.add(component.name[:-2])
+            elif getattr(component, "input_type", None) in ["checkboxes", "tree-view"]:
+                list_fields.add(component.name)
+
+    schema = FormSchema(
+        form=form,
+        question_count=len(form.questions or ()),
+        components=components,
+        component_index=MappingProxyType(component_index),
+        error_fields=MappingProxyType(error_fields),
+        list_fields=frozenset(list_fields),
+        date_prefixes=tuple(date_prefixes),
+        javascript_imports=frozenset(form.javascript_imports),
+        single_form_element=form.single_form_element,
+    )
+    form._schema = schema
+    return schema
+
+
+def forget_compiled_form(form: Form):
+    """
+    Drops a form's compiled schema (and so its component index) after one of its questions has been replaced
+    in place, so that it's compiled again when next needed
+    """
+    if not isinstance(form, FormSchema):
+        form._schema = None
+
+
+def get_form_component_index(form: Form):
+    """
+    Returns a mapping of every field name in a form to its component
+    List components (named like "field[]") are also indexed without the "[]", as we don't have "[]" in the api,
+    and date inputs are indexed by each of their day, month and year fields
+    """
+    return compile_form(form).component_index
+
+
 def convert_form_to_summary_list_instance(form: Form):
-    form.buttons[0].value = "Save and return"
-    form.buttons[0].action = "return"
+    # Buttons are shared with the original form definition, so swap in a copy rather than changing it
+    button = copy.copy(form.buttons[0])
+    button.value = "Save and return"
+    button.action = "return"
+    form.buttons[0] = button
     return form
 
 
 def insert_hidden_fields(data: dict, form: Form):
+    # Only add hidden fields if the data isn't already being passed through a component
+    component_index = get_form_component_index(form)
+    hidden_fields = []
     for key, value in data.items():
-        add = True
+        if key in component_index:
+            continue
+
+        # If the keys value is a list, insert each individually
+        if isinstance(value, list):
+            hidden_fields.extend(HiddenField(key + "[]", sub_value) for sub_value in value)
+        else:
+            hidden_fields.append(HiddenField(key, value))
+
+    # Keep the order the fields would have if each were inserted at the start of the form in turn
+    hidden_fields.reverse()
+    form.questions[:0] = hidden_fields
+
+
+class SummaryListRow:
+    """
+    A question on a summary list, with its display values resolved ahead of rendering
+    """
+
+    def __init__(self, component, title, change_title, value, pretty_value, details):
+        self.component = component
+        self.title = title
+        self.change_title = change_title
+        self.value = value
+        self.pretty_value = pretty_value
+        # (pretty_value, value) pairs for the components of the selected option
+        self.details = details
 
-        # Only add hidden fields if the data isn't already being passed through a component
-        for question in form.questions:
-            if hasattr(question, "name"):
-                if question.name == key or question.name[:-2] == key:
-                    add = False
 
-        if add:
-            form.questions.insert(0, HiddenField(key, value))
+class SummaryListSection:
+    def __init__(self, form, rows):
+        self.form = form
+        self.rows = rows
+
+
+def get_summary_list_sections(form_group: FormGroup, data, pretty_data, hide_components=None):
+    """
+    Builds the rows of a summary list, flattening the data once rather than once per lookup
+    """
+    data = flatten_data(data)
+    pretty_data = flatten_data(pretty_data)
+    hide_components = hide_components or []
+    sections = []
+
+    for form in form_group.forms:
+        single_form_element = form.single_form_element
+        rows = []
+
+        for component in form.questions:
+            if (
+                not hasattr(component, "name")
+                or getattr(component, "input_type", None) == "hidden"
+                or component.name in hide_components
+            ):
+                continue
+
+            if not single_form_element:
+                title = getattr(component, "short_title", None) or getattr(component, "title", "")
+            else:
+                title = (
+                    getattr(single_form_element, "short_title", None)
+                    or getattr(single_form_element, "title", None)
+                    or form.title
+                )
+
+            value = data.get(component.name)
+            pretty_value = pretty_data.get(component.name)
+            details = []
+            for option in getattr(component, "options", None) or []:
+                if not option:
+                    continue
+                for inner_component in option.components:
+                    if pretty_value == option.key or value == option.key:
+                        name = getattr(inner_component, "name", None)
+                        details.append((pretty_data.get(name), data.get(name)))
+
+            rows.append(
+                SummaryListRow(
+                    component=component,
+                    title=title,
+                    change_title=getattr(component, "short_title", None) or getattr(component, "title", ""),
+                    value=value,
+                    pretty_value=pretty_value,
+                    details=details,
+                )
+            )
+
+        sections.append(SummaryListSection(form, rows))
+
+    return sections
 
 
 def validate_data_unknown(object_pk, action, request, validated_data):
@@ -216,6 +495,21 @@ def validate_data_unknown(object_pk, action, request, validated_data):
     return return_value[0]
 
 
+async def validate_data_unknown_async(object_pk, action, request, validated_data):
+    """
+    validate_data_unknown for async views - action can be async, or sync, in which case it's run in a thread
+    """
+    args = (request, object_pk, validated_data) if object_pk else (request, validated_data)
+    if asyncio.iscoroutinefunction(action):
+        return_value = await action(*args)
+    else:
+        return_value = await sync_to_async(action, thread_sensitive=False)(*args)
+        if inspect.isawaitable(return_value):
+            return_value = await return_value
+
+    return return_value[0]
+
+
 def convert_list_to_tree(items, key="key", value="value", children="children", exclude=None):
     return_value = []
 
@@ -0,0 +1,399 @@
+import hashlib
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from copy import copy
+from typing import Optional
+
+from lite_forms.templatetags.custom_tags import key_in_array
+
+_WORD = re.compile(r"\w+")
+
+
+def _trigrams(text):
+    return {text[index : index + 3] for index in range(len(text) - 2)}
+
+
+def _starting_with(keys, positions, prefix):
+    """
+    Yields the positions of the keys in a sorted list which start with prefix
+    """
+    index = bisect_left(keys, prefix)
+    while index < len(keys) and keys[index].startswith(prefix):
+        yield positions[index]
+        index += 1
+
+
+class OptionIndex:
+    """
+    Index of a list of Options by key, by the start of their value and key, by the words in their value
+    and by the trigrams in their value and key, so that they can be looked up and searched without scanning the list
+    """
+
+    def __init__(self, options):
+        self.options = list(options)
+        self._keys = {}
+        self._texts = []
+        self._trigrams = {}
+
+        prefixes = []
+        words = []
+        for position, option in enumerate(self.options):
+            self._keys.setdefault(str(option.key), position)
+            value, key = str(option.value).lower(), str(option.key).lower()
+            prefixes.append((value, position))
+            prefixes.append((key, position))
+            words.extend((word, position) for word in set(_WORD.findall(value)))
+
+            text = f"{value} {key}"
+            self._texts.append(text)
+            for trigram in _trigrams(text):
+                self._trigrams.setdefault(trigram, []).append(position)
+
+        prefixes.sort()
+        self._prefixes = [prefix for prefix, _ in prefixes]
+        self._prefix_positions = [position for _, position in prefixes]
+        words.sort()
+        self._words = [word for word, _ in words]
+        self._word_positions = [position for _, position in words]
+
+    def __len__(self):
+        return len(self.options)
+
+    def get(self, key):
+        """
+        Returns the option with the given key, or None if there isn't one
+        """
+        position = self._keys.get(str(key))
+        return None if position is None else self.options[position]
+
+    def with_options(self, options):
+        """
+        Returns this index for another list of Options with the same keys and values, in the same order
+        """
+        index = copy(self)
+        index.options = list(options)
+        return index
+
+    def prefix_search(self, query, limit=None):
+        """
+        Returns the options whose value or key starts with the query, case insensitively, alphabetically
+        """
+        query = str(query).strip().lower()
+        if not query:
+            return []
+
+        positions = []
+        seen = set()
+        for position in _starting_with(self._prefixes, self._prefix_positions, query):
+            if limit is not None and len(positions) >= limit:
+                break
+            if position not in seen:
+                seen.add(position)
+                positions.append(position)
+        return [self.options[position] for position in positions]
+
+    def token_search(self, query, limit=None):
+        """
+        Returns the options with a word in their value starting with each word in the query, case insensitively,
+        in their original order
+        """
+        return [self.options[position] for position in self._token_positions(query)[:limit]]
+
+    def _token_positions(self, query):
+        matches = None
+        for token in set(_WORD.findall(str(query).lower())):
+            positions = set(_starting_with(self._words, self._word_positions, token))
+            matches = positions if matches is None else matches & positions
+            if not matches:
+                return []
+        return sorted(matches) if matches else []
+
+    def search(self, query, limit=10):
+        """
+        Returns up to limit options matching the query, case insensitively - options whose value or key starts with
+        it first (alphabetically), then options with words starting with its words, then options containing it
+        (in their original order)
+        """
+        query = str(query).strip().lower()
+        if not query or limit <= 0:
+            return []
+
+        positions = []
+        seen = set()
+
+        for position in _starting_with(self._prefixes, self._prefix_positions, query):
+            if len(positions) >= limit:
+                break
+            if position not in seen:
+                seen.add(position)
+                positions.append(position)
+
+        if len(positions) < limit:
+            for position in self._token_positions(query):
+                if position not in seen:
+                    seen.add(position)
+                    positions.append(position)
+                    if len(positions) >= limit:
+                        break
+
+        if len(positions) < limit and len(query) >= 3:
+            # Options containing every trigram in the query, checked for the query itself
+            candidates = sorted((self._trigrams.get(trigram, ()) for trigram in _trigrams(query)), key=len)
+            matches = set(candidates[0]).intersection(*candidates[1:])
+            for position in sorted(matches - seen):
+                if query in self._texts[position]:
+                    positions.append(position)
+                    if len(positions) >= limit:
+                        break
+
+        return [self.options[position] for position in positions]
+
+
+class Selection:
+    """
+    The keys selected in a component's data, for checking options against without scanning the data for each one
+    Matches key_in_array
+    """
+
+    __slots__ = ("data", "keys")
+
+    def __init__(self, data):
+        self.data = data
+        self.keys = None
+
+        if isinstance(data, list):
+            try:
+                self.keys = {item for item in data if not isinstance(item, dict)}
+                self.keys.update(item.get("id") for item in data if isinstance(item, dict))
+            except TypeError:
+                self.keys = None
+
+    def __contains__(self, key):
+        if self.keys is not None:
+            try:
+                return key in self.keys
+            except TypeError:
+                pass
+        return key_in_array(self.data, key)
+
+
+_cached_indexes = OrderedDict()
+_cached_indexes_lock = threading.Lock()
+MAX_CACHED_INDEXES = 128
+
+
+def _fingerprint(options):
+    return hashlib.sha1("\x1f".join(f"{option.key}\x1e{option.value}" for option in options).encode()).hexdigest()
+
+
+def index_options(options):
+    """
+    Returns an OptionIndex of a list of Options, reusing the index of any earlier list of Options with the same
+    keys and values, so that options built on every request are only indexed once
+    The last MAX_CACHED_INDEXES indexes used are kept
+    """
+    if isinstance(options, OptionSet):
+        return options.index
+
+    fingerprint = _fingerprint(options)
+    with _cached_indexes_lock:
+        index = _cached_indexes.get(fingerprint)
+        if index is not None:
+            _cached_indexes.move_to_end(fingerprint)
+            return index.with_options(options)
+
+    index = OptionIndex(options)
+
+    with _cached_indexes_lock:
+        index = _cached_indexes.setdefault(fingerprint, index)
+        while len(_cached_indexes) > MAX_CACHED_INDEXES:
+            _cached_indexes.popitem(last=False)
+    return index
+
+
+_option_sets = OrderedDict()
+_option_sets_lock = threading.Lock()
+MAX_OPTION_SETS = 128
+
+
+def _option_fingerprint(option):
+    return (
+        option.key,
+        option.value,
+        option._description,
+        option.data_attribute,
+        option.classes,
+        option.more_information,
+        option.tag,
+        option.disabled,
+        option.id,
+        option.show_or,
+        option.img_url,
+        option.auto_check,
+    )
+
+
+class OptionSet(tuple):
+    """
+    An immutable list of Options, shared by every OptionSet built from options with the same content, so that
+    their descriptions are only converted to HTML, and they're only indexed, once
+    The last MAX_OPTION_SETS option sets built are kept
+    """
+
+    def __new__(cls, options=()):
+        if isinstance(options, OptionSet):
+            return options
+
+        options = tuple(options)
+        if any(option.components for option in options):
+            # Options showing components aren't reference data, and their components can't be shared
+            option_set = super().__new__(cls, options)
+            option_set.fingerprint = None
+            return option_set
+
+        fingerprint = hashlib.sha1(repr([_option_fingerprint(option) for option in options]).encode()).hexdigest()
+        with _option_sets_lock:
+            option_set = _option_sets.get(fingerprint)
+            if option_set is not None:
+                _option_sets.move_to_end(fingerprint)
+                return option_set
+
+            option_set = _option_sets[fingerprint] = super().__new__(cls, options)
+            option_set.fingerprint = fingerprint
+            while len(_option_sets) > MAX_OPTION_SETS:
+                _option_sets.popitem(last=False)
+        return option_set
+
+    @classmethod
+    def from_items(cls, items, key="id", value="name", description=None):
+        """
+        Builds an OptionSet from a list of dictionaries, such as reference data from the API
+        """
+        from lite_forms.components import Option
+
+        return cls(
+            Option(item[key], item[value], description=item.get(description) if description else None) for item in items
+        )
+
+    @property
+    def index(self):
+        """
+        An OptionIndex of the options, built the first time it's needed
+        """
+        index = self.__dict__.get("_index")
+        if index is None:
+            index = self.__dict__["_index"] = OptionIndex(self)
+        return index
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return OptionSet, (tuple(self),)
+
+
+class ReferenceOptions:
+    """
+    Options built from reference data by fetch (a function returning Options or an OptionSet),
+    fetched and converted to an OptionSet once per process - or again every ttl seconds, or when refreshed
+    Call it to get the current OptionSet - common questions and register_options can be given it directly
+    """
+
+    def __init__(self, fetch, ttl: Optional[float] = None):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._options = None
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self._options is None or (self.ttl is not None and time.monotonic() - self._fetched_at >= self.ttl):
+                self._options = OptionSet(self.fetch())
+                self._fetched_at = time.monotonic()
+            return self._options
+
+    def refresh(self):
+        """
+        Fetches the options again the next time they're needed
+        """
+        with self._lock:
+            self._options = None
+
+
+def options_fingerprint(options):
+    """
+    Returns a fingerprint of a list of Options' keys and values, or of the identity of a function returning them
+    """
+    if isinstance(options, OptionSet) and options.fingerprint:
+        return options.fingerprint
+    if callable(options):
+        # Registered functions are kept alive, so their ids aren't reused while they're registered
+        return hashlib.sha1(f"{type(options).__qualname__}:{id(options)}".encode()).hexdigest()
+    return _fingerprint(options)
+
+
+_options = {}
+_indexes = {}
+# Fingerprints of the options registered by remote components, least recently used first
+_fingerprints = OrderedDict()
+_lock = threading.Lock()
+MAX_REMOTE_OPTIONS = 128
+
+
+def register_options(search_id, options, replace=True, fingerprint=None):
+    """
+    Registers options to be searched by OptionSearchView
+    options can be a list of Options or a function returning one, which is called when first needed,
+    or ReferenceOptions, which are fetched again when they expire
+    Remote components register their options with their fingerprint, so that the same options aren't registered
+    again, and only the last MAX_REMOTE_OPTIONS of them used are kept
+    """
+    with _lock:
+        if search_id in _options and (not replace or (fingerprint and _fingerprints.get(search_id) == fingerprint)):
+            if search_id in _fingerprints:
+                _fingerprints.move_to_end(search_id)
+            return
+
+        _options[search_id] = options
+        _indexes.pop(search_id, None)
+        _fingerprints.pop(search_id, None)
+        if fingerprint:
+            _fingerprints[search_id] = fingerprint
+            while len(_fingerprints) > MAX_REMOTE_OPTIONS:
+                oldest, _ = _fingerprints.popitem(last=False)
+                _options.pop(oldest, None)
+                _indexes.pop(oldest, None)
+
+
+def get_option_index(search_id):
+    """
+    Returns the index of registered options, building it the first time it's needed
+    """
+    with _lock:
+        if search_id in _fingerprints:
+            _fingerprints.move_to_end(search_id)
+
+        index = _indexes.get(search_id)
+        if index is not None:
+            return index
+
+        source = options = _options[search_id]
+
+    if isinstance(source, ReferenceOptions):
+        return source().index
+    if callable(options):
+        options = options()
+    index = OptionIndex(options)
+
+    with _lock:
+        # Only keep the index if the options haven't been replaced while it was being built
+        if _options.get(search_id) is source:
+            _indexes.setdefault(search_id, index)
+    return index
@@ -0,0 +1,1334 @@
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import StreamingHttpResponse
+from django.template.context import make_context
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.template.defaultfilters import add, linebreaksbr
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+from lite_forms.templatetags.custom_tags import (
+    key_value,
+    date_join,
+    dict_hidden_field,
+    file_type,
+    has_components,
+    markdown,
+    prefix_dots,
+    replace_spaces,
+    unique_list,
+)
+from lite_forms.options import Selection
+from lite_forms.trees import node_key
+
+
+class ResolvedComponent:
+    """
+    A question with its value and errors looked up once, ready to be rendered
+    """
+
+    def __init__(self, component, data, errors):
+        self.component = component
+        self.data = data
+        self.errors = errors
+        self.input_type = getattr(component, "input_type", None)
+
+        name = getattr(component, "name", None)
+        self.value = key_value(data, name)
+        self.error = key_value(errors, name)
+        self.has_error = bool(self.error)
+
+        prefix = getattr(component, "prefix", None)
+        if self.input_type == "date" and errors and prefix is not None:
+            self.has_error = self.has_error or any(prefix + part in errors for part in ["day", "month", "year"])
+
+
+class ComponentTemplate:
+    """
+    The template used to render an input type, and a function returning the context it's rendered with
+    """
+
+    def __init__(self, template_name, get_context):
+        self.template_name = template_name
+        self.get_context = get_context
+
+    def get_template_name(self, component):
+        return self.template_name
+
+
+class CustomComponentTemplate(ComponentTemplate):
+    def get_template_name(self, component):
+        return component.template
+
+
+class RemoteComponentTemplate(ComponentTemplate):
+    """
+    Uses remote_template_name for components whose options are searched remotely
+    """
+
+    def __init__(self, template_name, remote_template_name, get_context):
+        super().__init__(template_name, get_context)
+        self.remote_template_name = remote_template_name
+
+    def get_template_name(self, component):
+        return self.remote_template_name if getattr(component, "remote", False) else self.template_name
+
+
+def _component(field):
+    return {"component": field.component}
+
+
+def option_search_url(component):
+    return component.search_url or reverse("lite_forms:option_search", kwargs={"search_id": component.search_id})
+
+
+def selected_options(component, keys):
+    """
+    Returns the options for the selected keys of a remote AutocompleteInput or TokenBar,
+    using the key as the value for any which can't be found
+    """
+    try:
+        index = component.option_index
+    except KeyError:
+        index = None
+
+    options = []
+    for key in keys:
+        key = _lookup(key, "key") or key
+        option = index.get(key) if index else None
+        options.append(option or {"key": key, "value": key})
+    return options
+
+
+def _remote(field, keys):
+    component = field.component
+    if not getattr(component, "remote", False):
+        return {}
+    return {"search_url": option_search_url(component), "selected": selected_options(component, keys)}
+
+
+def _text_field(field):
+    return {
+        "component": field.component,
+        "name": field.component.name,
+        "value": field.value or "",
+        "error": field.error,
+    }
+
+
+COMPONENT_TEMPLATES = {
+    "text_input": ComponentTemplate("components/text_input.html", _text_field),
+    "email_input": ComponentTemplate("components/email.html", _text_field),
+    "filter": ComponentTemplate("components/filter.html", lambda field: {"placeholder": field.component.placeholder}),
+    "currency_input": ComponentTemplate(
+        "components/currency.html",
+        lambda field: {"name": field.component.name, "value": field.value or "", "error": field.error},
+    ),
+    "textarea": ComponentTemplate(
+        "components/textarea.html", lambda field: {**_text_field(field), "extras": field.component.extras},
+    ),
+    "number_input": ComponentTemplate(
+        "components/number.html",
+        lambda field: {
+            "component": field.component,
+            "name": field.component.name,
+            "value": field.value,
+            "error": field.error,
+        },
+    ),
+    "radiobuttons": ComponentTemplate(
+        "components/radiobuttons.html",
+        lambda field: {"component": field.component, "data": field.value, "component_data": field.data},
+    ),
+    "radiobuttons_image": ComponentTemplate(
+        "components/radiobuttons_image.html",
+        lambda field: {"component": field.component, "radiobuttons_data": field.value},
+    ),
+    "checkboxes": ComponentTemplate(
+        "components/checkboxes.html", lambda field: {"component": field.component, "data": field.value},
+    ),
+    "select": ComponentTemplate(
+        "components/select.html",
+        lambda field: {"component": field.component, "data": field.value, "error": field.error},
+    ),
+    "file_upload": ComponentTemplate(
+        "components/file_upload.html",
+        lambda field: {"name": field.component.name, "value": field.component.name, "data": field.value},
+    ),
+    "multi_file_upload": ComponentTemplate(
+        "components/multi_file_upload.html", lambda field: {"component": field.component, "data": field.value},
+    ),
+    "quantity_input": ComponentTemplate(
+        "components/quantity.html",
+        lambda field: {"name": field.component.name, "value": field.value or "", "error": field.error},
+    ),
+    "date": ComponentTemplate(
+        "components/date.html",
+        lambda field: {
+            "component": field.component,
+            "data": date_join(field.data, field.component.prefix) or "",
+            "errors": field.errors,
+        },
+    ),
+    "summary": ComponentTemplate("components/summary.html", _component),
+    "list": ComponentTemplate("components/list.html", _component),
+    "label": ComponentTemplate("components/label.html", _component),
+    "token-bar": RemoteComponentTemplate(
+        "components/token-bar.html",
+        "components/token-bar-remote.html",
+        lambda field: {
+            "component": field.component,
+            "value": field.value or "",
+            "error": field.error,
+            **_remote(field, unique_list(field.value or "")),
+        },
+    ),
+    "markdown": ComponentTemplate(
+        "components/markdown.html",
+        lambda field: {
+            "variables": getattr(field.component, "variables", ""),
+            "name": field.component.name,
+            "value": field.value or "",
+            "error": field.error,
+        },
+    ),
+    "link": ComponentTemplate("components/link.html", _component),
+    "warning": ComponentTemplate("components/warning.html", _component),
+    "tree-view": ComponentTemplate("components/tree-view.html", _component),
+    "autocomplete": RemoteComponentTemplate(
+        "components/autocomplete.html",
+        "components/autocomplete-remote.html",
+        lambda field: {
+            "component": field.component,
+            "value": field.value or "",
+            "data": getattr(field.component, "data", ""),
+            **_remote(field, [field.value] if field.value else []),
+        },
+    ),
+    "custom": CustomComponentTemplate(
+        None, lambda field: {"component": field.component, "data": field.component.data, "value": field.data},
+    ),
+}
+
+
+def register_component_template(input_type, template_name, get_context=_component):
+    """
+    Registers the template (and a function returning its context from a ResolvedComponent)
+    used to render components with the given input type
+    """
+    COMPONENT_TEMPLATES[input_type] = ComponentTemplate(template_name, get_context)
+
+
+def render_component(context, field: ResolvedComponent):
+    """
+    Renders a resolved component with the template registered for its input type,
+    in the same way as an {% include %} would
+    """
+    component_template = COMPONENT_TEMPLATES.get(field.input_type)
+    if not component_template:
+        return ""
+
+    template_name = component_template.get_template_name(field.component)
+
+    # Templates are cached for the rest of the render, as {% include %} does
+    cache = context.render_context.setdefault("lite_forms_component_templates", {})
+    template = cache.get(template_name)
+    if template is None:
+        template = cache[template_name] = context.template.engine.get_template(template_name)
+
+    with context.push(**component_template.get_context(field)):
+        return template.render(context)
+
+
+# Fragment cache
+#
+# Stores the HTML of questions which render the same on every request (headings, labels, warnings, details and the
+# options of selects and autocompletes), keyed on their content and the value and errors they're rendered with.
+
+
+class LocMemFragmentCache:
+    """
+    Thread safe, in-process LRU cache of rendered fragments, bounded by the total size of the fragments it holds
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, max_fragment_bytes=512 * 1024):
+        self.max_bytes = max_bytes
+        self.max_fragment_bytes = max_fragment_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                html, _ = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key, html):
+        size = len(html.encode())
+        if size > self.max_fragment_bytes:
+            return
+
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous:
+                self.size -= previous[1]
+            self._items[key] = (html, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._items),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class DjangoFragmentCache:
+    """
+    Stores rendered fragments in one of Django's caches, so they can be shared between processes
+    Fragments are keyed on a generation which clear replaces, so that clearing them leaves the rest of the cache
+    (which is often also used for sessions) alone
+    """
+
+    def __init__(self, alias="default", timeout=None, max_fragment_bytes=512 * 1024, key_prefix="lite-forms"):
+        self.alias = alias
+        self.timeout = timeout
+        self.max_fragment_bytes = max_fragment_bytes
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, key):
+        generation = self.cache.get(f"{self.key_prefix}:generation", "")
+        return f"{self.key_prefix}:{generation}:{key}"
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, html):
+        if len(html.encode()) <= self.max_fragment_bytes:
+            self.cache.set(self._key(key), str(html), self.timeout)
+
+    def clear(self):
+        # Fragments from earlier generations are left to expire, or to be evicted
+        self.cache.set(f"{self.key_prefix}:generation", secrets.token_hex(8), None)
+
+
+fragment_cache = LocMemFragmentCache()
+
+
+def set_fragment_cache(cache):
+    """
+    Sets the cache used for rendered fragments, or disables it if cache is None
+    """
+    global fragment_cache
+    fragment_cache = cache
+
+
+def fragment_key(kind, *parts):
+    """
+    Returns a cache key for a fragment, from a fingerprint of the content it's rendered from
+    """
+    fingerprint = hashlib.sha1("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+    return f"{kind}:{fingerprint}"
+
+
+def _component_fingerprint(component):
+    return [
+        _lookup(component, attribute)
+        for attribute in ("name", "title", "optional", "description", "accessible_description")
+    ]
+
+
+# Functions returning the content a component's fragment is rendered from, by input type
+FRAGMENT_FINGERPRINTS = {
+    "label": lambda component: (component.id, component.classes, component.text),
+    "warning": lambda component: (component.id, component.text),
+}
+
+
+# Fast renderer
+#
+# Renders questions to the same HTML as components.html (and the question loop in form.html) directly in Python,
+# avoiding the cost of an {% include %} per question, option and tree node. Input types without a renderer here
+# fall back to their registered template.
+
+
+def _text(value):
+    """
+    Returns a value as {{ value }} would render it
+    """
+    return conditional_escape(localize(value))
+
+
+def _lookup(obj, name):
+    """
+    Looks up obj.name as a template variable would, returning "" if it doesn't exist
+    """
+    try:
+        return obj[name]
+    except (TypeError, AttributeError, KeyError, ValueError, IndexError):
+        pass
+
+    return getattr(obj, name, "")
+
+
+def _contains(item, container):
+    try:
+        return item in container
+    except TypeError:
+        return False
+
+
+def _classes(classes):
+    return "".join(f"{_text(item)} " for item in classes or ())
+
+
+def _empty_notice(out, component):
+    out.append(
+        '<div class="lite-information-text"><span class="lite-information-text__icon" aria-hidden="true">!</span>'
+        '<p class="lite-information-text__text"><span class="govuk-visually-hidden">Information</span>'
+    )
+    out.append(_text(_lookup(component, "empty_notice")))
+    out.append("</p></div>")
+
+
+def _render_text_input(renderer, field, out):
+    component = field.component
+    name = _text(component.name)
+    out.append('<input class="govuk-input ')
+    if not component.classes:
+        out.append("govuk-input--width-20")
+    out.append(f" {_classes(component.classes)}")
+    if field.error:
+        out.append("govuk-input--error")
+    out.append(f'" id="{name}" type="text" name="{name}" value="{_text(field.value or "")}"/>')
+
+
+_EMAIL_SCRIPT = """<script type="text/javascript">
+	function tryShowEmailField(object) {
+		if ($(object).val().trim().length != 0) {
+			$("#email-pane-{name} .govuk-body-l").text($(object).val())
+			$("#email-pane-{name}").show();
+		} else {
+			$("#email-pane-{name}").hide();
+		}
+	}
+
+	$("#{name}").on('input propertychange paste', function() {
+		tryShowEmailField(this);
+	});
+
+	tryShowEmailField("#{name}");
+</script>"""
+
+
+def _render_email_input(renderer, field, out):
+    component = field.component
+    name = _text(component.name)
+    out.append('<input class="govuk-input ')
+    if not component.classes:
+        out.append("govuk-input--width-20")
+    out.append(f" {_classes(component.classes)}")
+    if field.error:
+        out.append("govuk-input--error")
+    out.append(
+        f'" id="{name}" name="{name}" type="email" aria-describedby="email-hint" autocomplete="email" '
+        f'spellcheck="false" value="{_text(field.value or "")}">'
+        f'<div id="email-pane-{name}" class="lite-email-panel govuk-inset-text">'
+        '<p class="govuk-hint govuk-!-margin-bottom-1">We\'ll send an email to:</p><p class="govuk-body-l"></p></div>'
+    )
+    out.append(_EMAIL_SCRIPT.replace("{name}", _text(prefix_dots(component.name))))
+
+
+def _render_currency_input(renderer, field, out):
+    name = _text(field.component.name)
+    error = "lite-currency--error" if field.error else ""
+    input_error = "govuk-input--error" if field.error else ""
+    out.append(
+        '<div class="govuk-visually-hidden">in pounds</div><div class="lite-currency-input">'
+        f'<div class="lite-currency-input__symbol {error}" aria-hidden="true">£</div>'
+        f'<input class="govuk-input govuk-input--width-10 {input_error}" id="{name}" type="text" name="{name}" '
+        f'value="{_text(field.value or "")}" aria-describedby="{name}" autocomplete="off" autocorrect="off"/></div>'
+    )
+
+
+def _render_textarea(renderer, field, out):
+    component = field.component
+    name = _text(component.name)
+    max_length = _lookup(component.extras, "max_length") if component.extras else ""
+    if max_length:
+        out.append(
+            '<div class="govuk-character-count" data-module="govuk-character-count" '
+            f'data-maxlength="{_text(max_length)}">'
+        )
+    out.append("<textarea ")
+    data_attributes = _lookup(component, "data_attributes")
+    if data_attributes:
+        for key, value in data_attributes.items():
+            out.append(f'data-{_text(key)}="{_text(value)}"')
+    out.append(f' class="govuk-textarea govuk-js-character-count {_classes(component.classes)} ')
+    if field.error:
+        out.append("govuk-textarea--error")
+    out.append(
+        f'" id="{name}" name="{name}" rows="{_text(component.rows)}" aria-describedby="{name}-info {name}-hint">'
+        f"{_text(field.value or '')}</textarea>"
+    )
+    if max_length:
+        out.append(
+            f'<span id="{name}-info" class="govuk-hint govuk-character-count__message" aria-live="polite">'
+            f"Enter up to {_text(max_length)} characters</span></div>"
+        )
+
+
+def _render_number_input(renderer, field, out, input_type="number", value=None):
+    name = _text(field.component.name)
+    error = "govuk-input--error" if field.error else ""
+    out.append(
+        f'<input class="govuk-input govuk-input--width-20 {error}" id="{name}" type="{input_type}" name="{name}" '
+        f'value="{_text(value if input_type != "number" else field.value)}" pattern="^[0-9]*.{{0,1}}[0-9]{{0,6}}$" '
+        'autocomplete="off" autocorrect="off"/>'
+    )
+
+
+def _render_quantity_input(renderer, field, out):
+    _render_number_input(renderer, field, out, input_type="quantity", value=field.value or "")
+
+
+def _render_radiobuttons(renderer, field, out):
+    component = field.component
+    if not component.options:
+        return _empty_notice(out, component)
+
+    name = _text(component.name)
+    conditional = "govuk-radios--conditional" if has_components(component.options) else ""
+    out.append(f'<div class="govuk-radios {_classes(component.classes)} {conditional}" data-module="govuk-radios">')
+    selected = Selection(field.value)
+    for item in component.options:
+        if _lookup(item, "show_or"):
+            out.append('<div class="govuk-radios__divider">or</div>')
+
+        key = _text(_lookup(item, "key"))
+        if item:
+            value = _text(item.value)
+            out.append(f'<div class="govuk-radios__item {_classes(item.classes)}"><input ')
+            if item.disabled:
+                out.append("disabled ")
+            if item.key in selected:
+                out.append("checked ")
+            out.append('class="govuk-radios__input" ')
+            show_pane = _lookup(item, "show_pane")
+            if show_pane:
+                out.append(f'show_pane="{_text(show_pane)}" ')
+            out.append(
+                f'id="{name}-{key}" data-presentation-value="{value}" name="{name}" type="radio" value="{key}" '
+                f'data-aria-controls="conditional-{name}-{key}-conditional">'
+                f'<label class="govuk-label govuk-radios__label" for="{name}-{key}"><span>{value}</span></label>'
+            )
+            if item.tag:
+                out.append(
+                    '<div><span class="govuk-tag govuk-tag--grey govuk-!-margin-left-3 govuk-!-margin-top-1 '
+                    f'govuk-!-margin-bottom-2">{_text(item.tag)}</span></div>'
+                )
+            if item.description:
+                out.append(
+                    '<p class="govuk-hint govuk-radios__hint govuk-!-margin-top-0" style="max-width: 700px;" '
+                    f'data-max-length="200">{linebreaksbr(mark_safe(item.description))}</p>'
+                )
+            if item.more_information:
+                out.append(
+                    '<details class="govuk-details govuk-!-margin-left-3" data-module="govuk-details">'
+                    '<summary class="govuk-details__summary"><span class="govuk-details__summary-text">'
+                    f'More information <span class="govuk-visually-hidden">about {value}</span></span></summary>'
+                    f'<div class="govuk-details__text">{_text(item.more_information)}</div></details>'
+                )
+            out.append("</div>")
+
+        if _lookup(item, "components"):
+            out.append(
+                '<div class="govuk-radios__conditional govuk-radios__conditional--hidden" '
+                f'id="conditional-{name}-{key}-conditional">'
+            )
+            for inner_component in item.components:
+                renderer.render_component(inner_component, out)
+            out.append("</div>")
+    out.append("</div>")
+
+
+def _render_checkboxes(renderer, field, out):
+    component = field.component
+    if not component.options:
+        return _empty_notice(out, component)
+
+    if component.show_select_links:
+        out.append(
+            '<div class="lite-buttons-row govuk-body govuk-!-margin-bottom-6 lite-js-only">'
+            '<a id="link-select-all" href="#" role="button" draggable="false" '
+            'class="govuk-link govuk-link--no-visited-state">Select all</a>'
+            '<a id="link-deselect-all" href="#" role="button" draggable="false" '
+            'class="govuk-link govuk-link--no-visited-state">Deselect all</a></div>'
+        )
+    name = _text(component.name)
+    out.append(f'<div class="govuk-checkboxes {_classes(component.classes)}">')
+    selected = Selection(field.value)
+    for item in component.options:
+        item_id = _text(item.id if item.id else replace_spaces(item.value))
+        out.append('<div class="govuk-checkboxes__item"><input ')
+        if item.auto_check and item.key in selected:
+            out.append("checked ")
+        out.append(
+            f'class="govuk-checkboxes__input" data-attribute="{_text(item.data_attribute)}" id="{item_id}" '
+            f'name="{name}" type="checkbox" value="{_text(item.key)}">'
+            f'<label class="govuk-label govuk-checkboxes__label" for="{item_id}">'
+            f'<span class="{_classes(item.classes)}">{_text(item.value)}</span></label>'
+        )
+        if item.description:
+            out.append(f'<label class="govuk-hint govuk-checkboxes__hint">{item.description}</label>')
+        out.append("</div>")
+    out.append("</div>")
+
+
+def _render_select(renderer, field, out):
+    component = field.component
+    name = _text(component.name)
+    error = "govuk-select--error" if field.error else ""
+    out.append(f'<select id="{name}" name="{name}" style="max-width: 41ex; width: 100%;" class="govuk-select {error}">')
+
+    def render_options(out, selection):
+        if component.include_default_select:
+            out.append('<option value="">Select</option>')
+        for item in component.options:
+            selected = "selected" if item.key in selection else ""
+            out.append(
+                f'<option value="{_text(item.key)}" {selected} data-attribute="{_text(item.data_attribute)}">'
+                f"{_text(item.value)}</option>"
+            )
+
+    selection = Selection(field.value)
+    fingerprint = getattr(component.options, "fingerprint", None)
+    if fingerprint and renderer.cache is not None:
+        # Options are cached without a selection, which is marked afterwards so that posted values aren't cached
+        key = fragment_key("select-options", component.include_default_select, fingerprint)
+        html = renderer.get_cached(key, lambda out: render_options(out, ()))
+        for item in component.options:
+            if item.key in selection:
+                option = f'<option value="{_text(item.key)}" '
+                html = html.replace(f"{option} data-attribute=", f"{option}selected data-attribute=")
+        out.append(html)
+    else:
+        render_options(out, selection)
+    out.append("</select>")
+
+
+_FILE_PREVIEW = (
+    '<svg width="100px" height="140px" viewbox="0 0 100 140" version="1.1" xmlns="http://www.w3.org/2000/svg" '
+    'xmlns:xlink="http://www.w3.org/1999/xlink">'
+    '<g id="Page-1" stroke="none" stroke-width="1" fill="none" fill-rule="evenodd">'
+    '<rect id="Rectangle" fill="#000000" x="12" y="58" width="10" height="10"></rect>'
+    '<rect id="Rectangle-Copy" fill="#000000" x="32" y="58" width="56" height="10"></rect>'
+    '<rect id="Rectangle-Copy-4" fill="#000000" x="12" y="78" width="10" height="10"></rect>'
+    '<rect id="Rectangle-Copy-3" fill="#000000" x="32" y="78" width="36" height="10"></rect>'
+    '<rect id="Rectangle-Copy-7" fill="#000000" x="12" y="98" width="10" height="10"></rect>'
+    '<rect id="Rectangle-Copy-6" fill="#000000" x="32" y="98" width="56" height="10"></rect>'
+    '<rect id="Rectangle-Copy-12" fill="#000000" x="12" y="118" width="10" height="10"></rect>'
+    '<rect id="Rectangle-Copy-11" fill="#000000" x="32" y="118" width="46" height="10"></rect>'
+    '<rect id="Rectangle" fill="#000000" x="12" y="12" width="76" height="30"></rect>'
+    "</g></svg>"
+)
+
+_FILE_UPLOAD_SCRIPT = """<script type="text/javascript" nonce="{nonce}">
+    $("#{name}").wrap( "<label class='lite-file-upload' tabindex='0'></label>" );
+    $("#{name}").after("<span>Drag and drop your document here or <span class='lite-file-upload__link'>click to browse</span></span>");
+
+    document.addEventListener('keypress', (event) => {
+        if(event.keyCode == '32'){
+            if (document.activeElement.tagName.toLowerCase() == "label") {
+                event.preventDefault();
+                $("#{name}").click();
+            }
+        }
+    });
+
+	$(document).ready(function(){
+	    $(window).on('dragenter', function(){
+	        $(this).preventDefault();
+	    });
+		$('.lite-file-upload').bind('dragover', function(){
+	        $(this).addClass('lite-file-upload--drag-over');
+	    });
+	    $('.lite-file-upload').bind('dragleave', function(){
+	        $(this).removeClass('lite-file-upload--drag-over');
+	    });
+	});
+
+	$(".lite-file-upload").on("dragover drop", function(e) {
+	    e.preventDefault();
+	}).on("drop", function(e) {
+	    $("input[type='file']").prop("files", e.originalEvent.dataTransfer.files)
+        $('.lite-file-upload').removeClass('lite-file-upload--drag-over');
+	});
+
+    $( "input[type=file]" ).change(function() {
+        fileName = $( this ).val().split('\\\\').pop();
+        $( "input[type=file]" ).next().html(fileName + "<br><span class='lite-file-upload__or-label'>Drag and drop your document here or <span class='lite-file-upload__link'>click to browse</span> to replace it</span>");
+    });
+</script>"""
+
+
+def _render_file_upload(renderer, field, out):
+    name = _text(field.component.name)
+    if field.value:
+        out.append(
+            '<span class="govuk-hint">Uploaded file:</span><div class="lite-file-upload__uploaded-file">'
+            '<div class="app-documents__item"><div class="app-documents__item-preview">'
+            f"{_FILE_PREVIEW}<span>{_text(file_type(field.value))}</span></div>"
+            '<div class="app-documents__item-details">'
+            f'<a class="govuk-body govuk-link govuk-link--no-visited-state" href="#">{_text(field.value)}</a>'
+            '</div></div></div><span class="govuk-hint">You can replace the uploaded file below:</span>'
+        )
+    out.append(f'<input id="{name}" type="file" name="{name}" />')
+    out.append(_FILE_UPLOAD_SCRIPT.replace("{nonce}", renderer.nonce).replace("{name}", name))
+
+
+def _render_multi_file_upload(renderer, field, out):
+    out.append(
+        '<input id="file" type="file" name="file" multiple/>'
+        '<!--<div class="dropzone">--><!--	<label for="file">Choose a file or drag it here</label>--><!--</div>-->'
+    )
+
+
+def _render_date(renderer, field, out):
+    component = field.component
+    prefix = _text(component.prefix)
+    date = date_join(field.data, component.prefix) or ""
+    has_error = _contains(component.prefix, field.errors) or _contains(
+        add(component.prefix, component.name), field.errors
+    )
+    error = "govuk-input--error" if has_error else ""
+    label_class = "govuk-visually-hidden" if component.inline_title else ""
+    out.append('<div class="govuk-form-group"><div class="govuk-date-input" id="date_of_issue">')
+    for part, title, width in [("day", "Day", 2), ("month", "Month", 2), ("year", "Year", 3)]:
+        placeholder = f'placeholder="{title}"' if component.inline_title else ""
+        out.append(
+            '<div class="govuk-date-input__item"><div class="govuk-form-group">'
+            f'<label class="govuk-label govuk-date-input__label {label_class}" for="{prefix}{part}">{title}</label>'
+            f'<input class="govuk-input govuk-date-input__input govuk-input--width-{width} {error}" '
+            f'id="{prefix}{part}" name="{prefix}{part}" type="number" value="{_text(_lookup(date, part))}" '
+            f"{placeholder} /></div></div>"
+        )
+    out.append("</div></div>")
+
+
+def _render_summary(renderer, field, out):
+    component = field.component
+    out.append(f'<dl class="govuk-summary-list {_classes(component.classes)}">')
+    for key, value in (component.values or {}).items():
+        out.append(
+            f'<div class="govuk-summary-list__row"><dt class="govuk-summary-list__key">{_text(key)}</dt>'
+            '<dd class="govuk-summary-list__value">'
+            f'<span data-max-length="300">{_text(markdown(value))}</span></dd></div>'
+        )
+    out.append("</dl>")
+
+
+def _render_list(renderer, field, out):
+    component = field.component
+    list_type = _lookup(component.type, "value")
+    unordered = list_type == 1 or list_type == 2
+    if unordered:
+        bullet = "govuk-list--bullet" if list_type == 2 else ""
+        out.append(f'<ul class="govuk-list {bullet} {_classes(component.classes)}">')
+    else:
+        out.append(f'<ol class="govuk-list govuk-list--number {_classes(component.classes)}">')
+    for item in component.items:
+        out.append(f"<li>{_text(item)}</li>")
+    out.append("</ul>" if unordered else "</ol>")
+
+
+def _render_label(renderer, field, out):
+    component = field.component
+    out.append(
+        f'<div id="{_text(component.id)}" class="govuk-body {_classes(component.classes)}">{component.text}</div>'
+    )
+
+
+_TOKEN_BAR_SCRIPT = """<script type="text/javascript" nonce="{nonce}">
+	$(document).ready(function() {
+		var items = [{items}];
+		var tokenField = new Tokenfield({
+			el: document.getElementById("token-bar-{name}"),
+			items: items,
+			newItems: false,
+			addItemOnBlur: true,
+			filterSetItems: false,
+			addItemsOnPaste: true,
+			minChars: 1,
+			itemName: '{name}',
+			setItems: [{set_items}]
+		});
+
+		$("#token-bar-{name}").remove();
+	});
+</script>"""
+
+
+def _token(key, value, classes):
+    classes = "".join(f"'{_text(item)}', " for item in classes or ())
+    return f"{{id: '{_text(key)}', name: '{_text(value)}', classes: [{classes}]}}"
+
+
+def _render_token_bar(renderer, field, out):
+    component = field.component
+    if getattr(component, "remote", False):
+        return renderer.render_template(field, out)
+
+    name = _text(component.name)
+    classes = "".join(_text(item) for item in component.classes or ())
+    out.append(
+        '<noscript><p class="govuk-label">Separate items with a space.</p></noscript>'
+        f'<div class="{classes}"><input class="govuk-input" type="text" name="{name}" value="" '
+        f'id="token-bar-{name}"></div>'
+    )
+    items = "".join(f"{_token(option.key, option.value, option.classes)}, " for option in component.options)
+    set_items = "".join(
+        f"{_token(_lookup(option, 'key') or option, _lookup(option, 'value') or option, _lookup(option, 'classes'))},, "
+        for option in unique_list(field.value or "")
+    )
+    out.append(
+        _TOKEN_BAR_SCRIPT.replace("{nonce}", renderer.nonce)
+        .replace("{items}", items)
+        .replace("{set_items}", set_items)
+        .replace("{name}", name)
+    )
+
+
+def _render_link(renderer, field, out):
+    component = field.component
+    name = _text(component.name)
+    classes = _classes(component.classes)
+    if component.form_action:
+        out.append(
+            f'<button id="{name}" name="{name}" class="lite-button--link {classes}" type="submit" '
+            f'formaction="{_text(component.address)}">{_text(component.text)}</button>'
+        )
+    else:
+        out.append(
+            f'<a id="{name}" name="{name}" class="govuk-link {classes}" href="{_text(component.address)}">'
+            f"{_text(component.text)}</a>"
+        )
+
+
+def _render_warning(renderer, field, out):
+    component = field.component
+    out.append(
+        f'<div class="govuk-warning-text" id="{_text(component.id)}">'
+        '<span class="govuk-warning-text__icon" aria-hidden="true">!</span>'
+        '<strong class="govuk-warning-text__text"><span class="govuk-warning-text__assistive">Warning</span>'
+        f"{_text(component.text)}</strong></div>"
+    )
+
+
+_TREE_VIEW_SCRIPT = """<script type="text/javascript">
+	function updateCheckboxes($checkbox) {
+		$checkbox.parents(".lite-tree-view__root").each(function() {
+			var $summary = $(this).find("> .lite-tree-view__summary .govuk-checkboxes__input");
+			var $siblings = $(this).find("> .lite-tree-view__children");
+
+			if ($siblings.find('input:checkbox:checked').length == $siblings.find('input:checkbox').length) {
+				$summary.prop('checked', true);
+				$summary.prop('indeterminate', false);
+			} else if ($siblings.find('input:checkbox:checked').length) {
+				$summary.prop('checked', false);
+				$summary.prop('indeterminate', true);
+			} else {
+				$summary.prop('checked', false);
+				$summary.prop('indeterminate', false);
+			}
+		});
+	}
+
+	$(".lite-tree-view__summary .govuk-checkboxes__input").click(function() {
+		var $parentSummary = $(this).parents(".lite-tree-view__summary").next();
+
+		if ($parentSummary.find('input:checkbox:checked').length == $parentSummary.find('input:checkbox').length) {
+			$parentSummary.find(".govuk-checkboxes__input").prop('checked', false);
+			$parentSummary.find(".govuk-checkboxes__input").prop('indeterminate', false);
+		} else {
+			$parentSummary.find(".govuk-checkboxes__input").prop('checked', true);
+			$parentSummary.find(".govuk-checkboxes__input").prop('indeterminate', false);
+		}
+
+		updateCheckboxes($(this));
+	});
+
+	$(".lite-tree-view__children > .govuk-checkboxes__item .govuk-checkboxes__input").click(function() {
+		updateCheckboxes($(this));
+	});
+
+	updateCheckboxes($(".lite-tree-view__root:first-of-type .lite-tree-view__summary:first-of-type .govuk-checkboxes__input:first-of-type"));
+</script>"""
+
+
+def selected_keys(items):
+    """
+    Returns the keys selected in a tree view's data as a set, matching item_with_rating_exists
+    """
+    if not items:
+        return frozenset()
+    return {item if isinstance(item, str) else item["rating"] for item in items if isinstance(item, (str, dict))}
+
+
+def _expanded_nodes(root, selected):
+    """
+    Returns the set of nodes in a tree which have a selected node below them
+    """
+    expanded = set()
+    path = []
+    stack = [(node, 0) for node in reversed(root.children)]
+    while stack:
+        node, depth = stack.pop()
+        del path[depth:]
+        if node.key in selected:
+            for ancestor in reversed(path):
+                if ancestor in expanded:
+                    break
+                expanded.add(ancestor)
+        path.append(node)
+        stack.extend((child, depth + 1) for child in reversed(node.children))
+    return expanded
+
+
+def render_tree(name, root, selected, skip_collapsed=False, max_depth=None, children_url=None):
+    """
+    Renders a tree's nodes as components/node.html does, iteratively rather than with an include per level
+    If skip_collapsed is set, the children of nodes with nothing selected below them aren't rendered
+    If max_depth is set, the children of nodes below that depth with nothing selected below them are left to be
+    loaded from children_url when they're expanded
+    """
+    out = []
+    escaped_name = _text(name)
+    selected = selected_keys(selected)
+    expanded = _expanded_nodes(root, selected) if skip_collapsed or max_depth is not None else None
+
+    stack = [iter(root.children)]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            if stack:
+                out.append("</div></details>")
+            continue
+
+        children = node.children
+        node_id = _text(node.key if node.key else replace_spaces(node.value))
+        collapsed = children and expanded is not None and node not in expanded
+        lazy = collapsed and max_depth is not None and len(stack) >= max_depth
+        if lazy:
+            url = f"{children_url}?{urlencode({'key': node_key(node), 'name': name})}"
+            out.append(
+                f'<details class="lite-tree-view__root" data-children-url="{_text(url)}">'
+                '<summary class="lite-tree-view__summary">'
+            )
+        elif children:
+            out.append('<details class="lite-tree-view__root"><summary class="lite-tree-view__summary">')
+        out.append('<div class="govuk-checkboxes__item"><input class="govuk-checkboxes__input" ')
+        if node.key in selected:
+            out.append("checked ")
+        out.append(f'id="node-{node_id}" type="checkbox" ')
+        if node.key:
+            out.append(f'name="{escaped_name}" value="{_text(node.key)}"')
+        out.append(
+            f'><label class="govuk-label govuk-checkboxes__label" for="node-{node_id}">{_text(node.value)}</label></div>'
+        )
+        if children:
+            out.append('</summary><div class="lite-tree-view__children">')
+            if lazy or (collapsed and skip_collapsed):
+                out.append("</div></details>")
+            else:
+                stack.append(iter(children))
+
+    return mark_safe("".join(out))
+
+
+def render_tree_view(component, selected):
+    """
+    Renders a TreeView's nodes, and the script to load lazy subtrees if it has any
+    """
+    if component.lazy_depth is None:
+        return render_tree(component.name, component.data, selected, component.skip_collapsed)
+
+    children_url = component.children_url or reverse("lite_forms:tree_children", kwargs={"tree_id": component.tree_id})
+    html = render_tree(
+        component.name, component.data, selected, component.skip_collapsed, component.lazy_depth, children_url
+    )
+    return mark_safe(html + _TREE_VIEW_LAZY_SCRIPT)
+
+
+_TREE_VIEW_LAZY_SCRIPT = """<script type="text/javascript">
+	$(document).on("click", ".lite-tree-view__root[data-children-url] > .lite-tree-view__summary", function() {
+		var $root = $(this).parent();
+		var url = $root.attr("data-children-url");
+		$root.removeAttr("data-children-url");
+
+		$.get(url, function(html) {
+			var $children = $root.find("> .lite-tree-view__children").html(html);
+			$children.find(".govuk-checkboxes__input").prop("checked", $(this).find(".govuk-checkboxes__input").prop("checked"));
+			$children.find(".govuk-checkboxes__input").click(function() {
+				updateCheckboxes($(this));
+			});
+		}.bind(this));
+	});
+</script>"""
+
+
+def _render_tree_view(renderer, field, out):
+    out.append('<div class="lite-tree-view">')
+    out.append(render_tree_view(field.component, field.value))
+    out.append("</div>")
+    out.append(_TREE_VIEW_SCRIPT)
+
+
+def _render_autocomplete(renderer, field, out):
+    component = field.component
+    if getattr(component, "remote", False):
+        return renderer.render_template(field, out)
+
+    name = _text(component.name)
+    value = field.value or ""
+    error = "govuk-select--error" if _lookup(component, "error") else ""
+    out.append(f'<select id="{name}" name="{name}" class="govuk-select {error}"><option value="">Select</option>')
+
+    def render_options(out, value):
+        for item in component.options:
+            selected = "selected" if value == item.key else ""
+            out.append(f'<option value="{_text(item.key)}" {selected}>{_text(item.value)}</option>')
+
+    fingerprint = getattr(component.options, "fingerprint", None)
+    if fingerprint and renderer.cache is not None:
+        # As for selects, the selected option is marked after the options are fetched from the cache
+        html = renderer.get_cached(
+            fragment_key("autocomplete-options", fingerprint), lambda out: render_options(out, None)
+        )
+        for item in component.options:
+            if value == item.key:
+                option = f'<option value="{_text(item.key)}" '
+                html = html.replace(f"{option}>", f"{option}selected>")
+        out.append(html)
+    else:
+        render_options(out, value)
+    out.append("</select>")
+    out.append(
+        _AUTOCOMPLETE_SCRIPT.replace("{nonce}", renderer.nonce)
+        .replace(
+            "{start}", "function loadAutoCompletes() {" if component.deferred else "$(document).ready(function() {"
+        )
+        .replace("{end}", "}" if component.deferred else "});")
+        .replace("{name}", _text(prefix_dots(component.name)))
+    )
+
+
+_AUTOCOMPLETE_SCRIPT = """<script type="text/javascript" nonce="{nonce}">
+	{start}
+			accessibleAutocomplete.enhanceSelectElement({
+				defaultValue: '',
+				displayMenu: 'overlay',
+				selectElement: document.querySelector('#{name}'),
+				cssNamespace: 'lite-autocomplete',
+				onConfirm: (val) => {
+					if (val && $("#{name}").val()) {
+						$("#{name}-select option").filter(function() {
+						  return $(this).text() != val;
+						}).prop('selected', false);
+						$("#{name}-select option").filter(function() {
+						  return $(this).text() == val;
+						}).prop('selected', true);
+
+					} else if (val == undefined && $("#{name}").val() == "") {
+						$("#{name}-select option").filter(function() {
+						  return $(this).text() != val;
+						}).prop('selected', false);
+					}
+				}
+			});
+	{end}
+</script>"""
+
+
+def _render_hidden(renderer, field, out):
+    out.append(dict_hidden_field(field.component.name, field.component.value))
+
+
+def _render_group(renderer, field, out):
+    component = field.component
+    out.append(f'<div id="pane_{_text(_lookup(component, "name"))}" class="{_classes(component.classes)}">')
+    for inner_component in component.components:
+        renderer.render_component(inner_component, out)
+    out.append("</div>")
+
+
+FAST_RENDERERS = {
+    "hidden": _render_hidden,
+    "group": _render_group,
+    "text_input": _render_text_input,
+    "email_input": _render_email_input,
+    "currency_input": _render_currency_input,
+    "textarea": _render_textarea,
+    "number_input": _render_number_input,
+    "radiobuttons": _render_radiobuttons,
+    "checkboxes": _render_checkboxes,
+    "select": _render_select,
+    "file_upload": _render_file_upload,
+    "multi_file_upload": _render_multi_file_upload,
+    "quantity_input": _render_quantity_input,
+    "date": _render_date,
+    "summary": _render_summary,
+    "list": _render_list,
+    "label": _render_label,
+    "token-bar": _render_token_bar,
+    "link": _render_link,
+    "warning": _render_warning,
+    "tree-view": _render_tree_view,
+    "autocomplete": _render_autocomplete,
+}
+
+
+class FastRenderer:
+    """
+    Renders a form's questions to HTML in Python, producing the same output as the question loop in form.html
+    Input types without a function in FAST_RENDERERS are rendered with their registered template
+    """
+
+    def __init__(self, context, data, errors):
+        self.context = context
+        self.data = data
+        self.errors = errors
+        request = context.get("request")
+        self.nonce = _text(getattr(request, "csp_nonce", ""))
+        self.cache = fragment_cache
+
+    def render(self, questions):
+        out = []
+        for question in questions or ():
+            self.render_question(question, out)
+        return mark_safe("".join(out))
+
+    def stream(self, questions):
+        """
+        Yields the HTML of each question in turn
+        """
+        for question in questions or ():
+            out = []
+            self.render_question(question, out)
+            yield "".join(out)
+
+    def render_question(self, question, out):
+        input_type = _lookup(question, "input_type")
+        if input_type == "html_block":
+            out.append(question.html)
+        elif input_type == "detail" and not question.components:
+            key = fragment_key("detail", question.title, question.description)
+            self.render_cached(key, lambda out: self.render_detail(question, out), out)
+        elif input_type == "detail":
+            self.render_detail(question, out)
+        elif input_type == "heading":
+            key = fragment_key("heading", question.text, question.heading_style)
+            self.render_cached(key, lambda out: self.render_heading(question, out), out)
+        elif input_type == "side_by_side":
+            out.append('<div class="lite-side-by-side-wrapper">')
+            for component in question.questions:
+                self.render_component(component, out)
+            out.append("</div>")
+        else:
+            self.render_component(question, out)
+
+    def render_cached(self, key, render, out):
+        """
+        Appends a fragment from the fragment cache, rendering it with render(out) and caching it if it's missing
+        """
+        if self.cache is None:
+            return render(out)
+
+        out.append(self.get_cached(key, render))
+
+    def get_cached(self, key, render):
+        """
+        Returns a fragment from the fragment cache, rendering it with render(out) and caching it if it's missing
+        """
+        html = self.cache.get(key)
+        if html is None:
+            fragment = []
+            render(fragment)
+            html = "".join(fragment)
+            self.cache.set(key, html)
+        return html
+
+    def render_detail(self, question, out):
+        out.append(
+            '<details class="govuk-details"><summary class="govuk-details__summary">'
+            f'<span class="govuk-details__summary-text">{_text(question.title)}</span></summary>'
+            '<div class="govuk-details__text">'
+        )
+        if question.description:
+            out.append(question.description)
+        for component in question.components or ():
+            self.render_component(component, out)
+        out.append("</div></details>")
+
+    def render_heading(self, question, out):
+        level = _text(_lookup(question.heading_style, "value"))
+        out.append(
+            f'<br/><h{level} class="govuk-heading-{_text(str(question.heading_style).lower())}">'
+            f"{_text(question.text)}</h{level}>"
+        )
+
+    def render_component(self, component, out):
+        """
+        Renders a component as components.html does
+        """
+        field = ResolvedComponent(component, self.data, self.errors)
+        fingerprint = FRAGMENT_FINGERPRINTS.get(field.input_type)
+        if fingerprint:
+            key = fragment_key(
+                field.input_type, *_component_fingerprint(component), *fingerprint(component), field.value, field.error,
+            )
+            self.render_cached(key, lambda out: self.render_field(field, out), out)
+        else:
+            self.render_field(field, out)
+
+    def render_field(self, field, out):
+        component = field.component
+        name = _text(_lookup(component, "name"))
+        classes = "govuk-form-group "
+        if field.input_type == "hidden":
+            classes += "govuk-visually-hidden "
+        if field.has_error:
+            classes += "govuk-form-group--error "
+        out.append(f'<div id="pane_{name}" class="{classes}">')
+
+        title = _lookup(component, "title")
+        if title:
+            out.append(f'<label class="govuk-label" for="{name}">{_text(title)}')
+            if _lookup(component, "optional"):
+                out.append(
+                    '<span class="lite-form-optional"><span class="govuk-visually-hidden">This field is </span>'
+                    "(optional)</span>"
+                )
+            out.append("</label>")
+        description = _lookup(component, "description")
+        if description:
+            out.append(f'<span class="govuk-hint" for="{name}"><span>{description}</span></span>')
+        accessible_description = _lookup(component, "accessible_description")
+        if accessible_description:
+            out.append(
+                f'<span class="govuk-hint govuk-visually-hidden" for="{name}">{_text(accessible_description)}</span>'
+            )
+
+        out.append("<!-- Error -->")
+        if self.errors and field.error and field.input_type != "hidden":
+            errors = " ".join(_text(error) for error in field.error)
+            out.append(
+                f'<span id="error-{name}" for="{name}" class="govuk-error-message">'
+                f'<span class="govuk-visually-hidden">Error:</span>{errors}</span>'
+            )
+
+        out.append('<!-- Import component based on input_type --><div class="govuk-form-group">')
+        render = FAST_RENDERERS.get(field.input_type)
+        if render:
+            render(self, field, out)
+        else:
+            self.render_template(field, out)
+        out.append("</div></div>")
+
+    def render_template(self, field, out):
+        """
+        Renders a field with its registered template, as form.html would
+        """
+        with self.context.push(question=field.component, data=self.data, errors=self.errors):
+            out.append(render_component(self.context, field))
+
+
+def use_fast_renderer(form):
+    """
+    Returns whether a form should be rendered with the FastRenderer, either because it's been set on the form
+    or globally with the LITE_FORMS_FAST_RENDERER setting
+    """
+    fast_render = getattr(form, "fast_render", None)
+    if fast_render is None:
+        return getattr(settings, "LITE_FORMS_FAST_RENDERER", False)
+    return fast_render
+
+
+# Streaming
+#
+# Pages are rendered with STREAM_MARKER in place of their body, and sent as the part of the page before the marker,
+# the body in chunks and then the rest of the page, so that the first byte doesn't wait on the whole body.
+
+STREAM_MARKER = mark_safe("<!-- lite-forms stream -->")
+
+
+def use_streaming(stream=None):
+    """
+    Returns whether a page should be streamed, either because it's been asked for
+    or globally with the LITE_FORMS_STREAMING setting
+    """
+    if stream is None:
+        return getattr(settings, "LITE_FORMS_STREAMING", False)
+    return stream
+
+
+def stream_template(request, template_name, context, render_chunks):
+    """
+    Returns a StreamingHttpResponse of a template rendered with stream_marker in its context,
+    replacing the marker with the chunks yielded by render_chunks(context)
+    """
+    template = get_template(template_name).template
+    context = make_context({**context, "stream_marker": STREAM_MARKER}, request, autoescape=template.engine.autoescape)
+    head, _, tail = template.render(context).partition(STREAM_MARKER)
+
+    def stream():
+        yield head
+        with context.render_context.push_state(template), context.bind_template(template):
+            yield from render_chunks(context)
+        yield tail
+
+    return StreamingHttpResponse(stream())
+
+
+def stream_template_chunks(context, template_name, name, items):
+    """
+    Yields a template rendered with each item, as name, in turn
+    """
+    template = context.template.engine.get_template(template_name)
+    for item in items:
+        with context.push({name: item}):
+            yield template.render(context)
@@ -0,0 +1,200 @@
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from lite_forms.components import HiddenField
+from lite_forms.helpers import get_form_component_index
+
+STATE_TOKEN = "_state"
+
+
+def _owner(request):
+    """
+    Returns who state belongs to - the request's session, so that a token can't be used from another one
+    """
+    session = getattr(request, "session", None)
+    return getattr(session, "session_key", None) or ""
+
+
+class WizardStateStore:
+    """
+    Base for stores keeping the answers given so far in a MultiFormView or SummaryListFormView on the server,
+    so that each page only posts its own fields and a state token rather than every earlier answer
+    """
+
+    def new_token(self):
+        return secrets.token_urlsafe(24)
+
+    def load(self, request, token):
+        """
+        Returns the answers stored under token, or None if there aren't any
+        """
+        raise NotImplementedError
+
+    def save(self, request, token, data):
+        raise NotImplementedError
+
+    def delete(self, request, token):
+        raise NotImplementedError
+
+
+class SessionStateStore(WizardStateStore):
+    """
+    Stores answers in the Django session, keeping the last max_states wizards per session
+    """
+
+    def __init__(self, key="lite_forms_state", max_states=10):
+        self.key = key
+        self.max_states = max_states
+
+    def load(self, request, token):
+        return request.session.get(self.key, {}).get(token)
+
+    def save(self, request, token, data):
+        states = request.session.get(self.key, {})
+        states.pop(token, None)
+        states[token] = data
+        while len(states) > self.max_states:
+            del states[next(iter(states))]
+        request.session[self.key] = states
+
+    def delete(self, request, token):
+        states = request.session.get(self.key, {})
+        if states.pop(token, None) is not None:
+            request.session[self.key] = states
+
+
+class CacheStateStore(WizardStateStore):
+    """
+    Stores answers in one of Django's caches for timeout seconds after they were last saved
+    """
+
+    def __init__(self, alias="default", timeout=60 * 60, key_prefix="lite-forms-state"):
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def load(self, request, token):
+        state = self.cache.get(f"{self.key_prefix}:{token}")
+        if state and state["owner"] == _owner(request):
+            return state["data"]
+
+    def save(self, request, token, data):
+        self.cache.set(f"{self.key_prefix}:{token}", {"owner": _owner(request), "data": data}, self.timeout)
+
+    def delete(self, request, token):
+        self.cache.delete(f"{self.key_prefix}:{token}")
+
+
+class SQLiteStateStore(WizardStateStore):
+    """
+    Stores answers in a local SQLite database for timeout seconds after they were last saved
+    Only suitable for a single server, such as when developing
+    """
+
+    def __init__(self, path=None, timeout=60 * 60):
+        self.path = path or os.path.join(tempfile.gettempdir(), "lite-forms-state.sqlite3")
+        self.timeout = timeout
+        self._created = False
+        self._lock = threading.Lock()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._created:
+            with self._lock, connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS state (token TEXT PRIMARY KEY, owner TEXT, data TEXT, expires REAL)"
+                )
+            self._created = True
+        return connection
+
+    def load(self, request, token):
+        connection = self.connect()
+        try:
+            row = connection.execute(
+                "SELECT data FROM state WHERE token = ? AND owner = ? AND expires > ?",
+                (token, _owner(request), time.time()),
+            ).fetchone()
+        finally:
+            connection.close()
+        return json.loads(row[0]) if row else None
+
+    def save(self, request, token, data):
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM state WHERE expires <= ?", (time.time(),))
+                connection.execute(
+                    "INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)",
+                    (token, _owner(request), json.dumps(data), time.time() + self.timeout),
+                )
+        finally:
+            connection.close()
+
+    def delete(self, request, token):
+        connection = self.connect()
+        try:
+            with connection:
+                connection.execute("DELETE FROM state WHERE token = ?", (token,))
+        finally:
+            connection.close()
+
+
+def get_state_store(store=None):
+    """
+    Returns the store to keep a view's answers in - the one set on the view, or an instance of the class
+    named by the LITE_FORMS_STATE_STORE setting - or None if answers are passed between pages as hidden fields
+    """
+    if store is not None:
+        return store
+
+    path = getattr(settings, "LITE_FORMS_STATE_STORE", None)
+    return import_string(path)() if path else None
+
+
+def load_state(store, request):
+    """
+    Returns the state token posted with a request and the answers stored under it,
+    or a new token and no answers if there aren't any
+    """
+    token = request.POST.get(STATE_TOKEN)
+    data = store.load(request, token) if token else None
+    if data is None:
+        return store.new_token(), {}
+    return token, data
+
+
+def merge_state(state, data, form=None):
+    """
+    Returns the stored answers updated with the ones posted
+    If form is given, its fields are cleared first, so fields which aren't posted when empty (such as checkboxes)
+    don't keep their earlier answers
+    """
+    if form is not None:
+        component_index = get_form_component_index(form)
+        state = {key: value for key, value in state.items() if key not in component_index}
+    else:
+        state = dict(state)
+
+    state.update(data)
+    state.pop(STATE_TOKEN, None)
+    return state
+
+
+def insert_state_token(form, token):
+    """
+    Adds the state token to the start of a form as a hidden field
+    """
+    form.questions.insert(0, HiddenField(STATE_TOKEN, token))
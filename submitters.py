@@ -1,8 +1,9 @@
 from typing import Callable
 
+from asgiref.sync import sync_to_async
 from django.http import QueryDict
 
-from lite_forms.components import HiddenField, Form, FormGroup
+from lite_forms.components import Form, FormGroup
 from lite_forms.generators import form_page
 from lite_forms.helpers import (
     remove_unused_errors,
@@ -12,7 +13,11 @@ from lite_forms.helpers import (
     flatten_data,
     get_previous_form,
     handle_lists,
+    validate_data_unknown,
+    validate_data_unknown_async,
+    insert_hidden_fields,
 )
+from lite_forms.state import STATE_TOKEN, load_state, merge_state, insert_state_token
 
 
 def submit_single_form(request, form: Form, action: Callable, object_pk=None, override_data=None):
@@ -62,13 +67,21 @@ def _prepare_data(request, inject_data):
         del data["form_pk"]
     if "csrfmiddlewaretoken" in data:
         del data["csrfmiddlewaretoken"]
+    if STATE_TOKEN in data:
+        del data[STATE_TOKEN]
 
     # Post the data to the validator and check for errors
     return data, nest_data(data)
 
 
 def submit_paged_form(  # noqa
-    request, form_group: FormGroup, action: Callable, object_pk=None, inject_data=None, additional_context: dict = None,
+    request,
+    form_group: FormGroup,
+    action: Callable,
+    object_pk=None,
+    inject_data=None,
+    additional_context: dict = None,
+    state_store=None,
 ):
     """
     Function to handle the submission of the data from one form in a sequence of forms (a FormGroup).
@@ -78,28 +91,84 @@ def submit_paged_form(  # noqa
     :param object_pk: Entity primary key to be supplied with the submission, if any
     :param inject_data: Additional data to be added to the supplied request's data before submitting
     :param additional_context: Adds additional items to context for form
+    :param state_store: A WizardStateStore to keep earlier answers in, instead of passing them between forms as
+    hidden fields
     :return: The next form page to display
     """
+    flow = _paged_form_flow(request, form_group, inject_data, additional_context, state_store)
+    return run_flow(flow, lambda data: validate_data_unknown(object_pk, action, request, data))
+
+
+async def submit_paged_form_async(  # noqa
+    request,
+    form_group: FormGroup,
+    action: Callable,
+    object_pk=None,
+    inject_data=None,
+    additional_context: dict = None,
+    state_store=None,
+):
+    """
+    submit_paged_form for async views - action can be async, and everything else is run in a thread
+    """
+    flow = _paged_form_flow(request, form_group, inject_data, additional_context, state_store)
+    return await run_flow_async(flow, lambda data: validate_data_unknown_async(object_pk, action, request, data))
+
+
+def run_flow(flow, validate):
+    """
+    Runs a generator which yields data to be validated and is sent back the result, returning its return value
+    """
+    done, value = _advance(flow, None)
+    while not done:
+        done, value = _advance(flow, validate(value))
+    return value
+
+
+async def run_flow_async(flow, validate):
+    """
+    run_flow for async views - validate returns an awaitable, and each step of the flow is run in a thread
+    """
+    advance = sync_to_async(_advance)
+    done, value = await advance(flow, None)
+    while not done:
+        done, value = await advance(flow, await validate(value))
+    return value
+
+
+def _advance(flow, value):
+    # StopIteration can't be raised out of a thread by sync_to_async, so the flow's return value is returned instead
+    try:
+        return False, flow.send(value)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+def _paged_form_flow(request, form_group: FormGroup, inject_data, additional_context, state_store):  # noqa
+    """
+    The flow of submit_paged_form, yielding the nested data to be validated with its action
+    """
     if additional_context is None:
         additional_context = {}
 
-    data, nested_data = _prepare_data(request, inject_data)
-
     form_pk = request.POST.get("form_pk")
     previous_form = get_previous_form(form_pk, form_group)
     current_form = get_form_by_pk(form_pk, form_group)
     next_form = get_next_form(form_pk, form_group)
 
+    if state_store:
+        return (
+            yield from _paged_form_flow_with_state(
+                request, inject_data, additional_context, state_store, previous_form, current_form, next_form
+            )
+        )
+
+    data, nested_data = _prepare_data(request, inject_data)
+
     if data.get("_action") and data.get("_action") == "back":
         # Add existing post data to previous form as hidden fields
         post_data, _ = _prepare_data(request, {})
-        for key, value in post_data.items():
-            # If the keys value is a list, insert each individually
-            if isinstance(value, list):
-                for sub_value in value:
-                    previous_form.questions.insert(0, HiddenField(key + "[]", sub_value))
-            else:
-                previous_form.questions.insert(0, HiddenField(key, value))
+        insert_hidden_fields(post_data, previous_form)
 
         return (
             form_page(
@@ -108,10 +177,7 @@ def submit_paged_form(  # noqa
             None,
         )
 
-    if object_pk:
-        validated_data, _ = action(request, object_pk, nested_data)
-    else:
-        validated_data, _ = action(request, nested_data)
+    validated_data = yield nested_data
 
     # If the API returns errors, add the existing questions to the reloaded form
     errors = validated_data.get("errors")
@@ -121,25 +187,7 @@ def submit_paged_form(  # noqa
         errors = remove_unused_errors(errors, current_form)
 
     if errors:
-        for key, value in data.items():
-            exists = False
-
-            for question in current_form.questions:
-                if hasattr(question, "prefix") and question.prefix:
-                    if question.prefix in key:
-                        exists = True
-                        continue
-                elif hasattr(question, "name"):
-                    if question.name == key:
-                        exists = True
-                        continue
-
-            if not exists:
-                if isinstance(value, list):
-                    for sub_value in value:
-                        current_form.questions.insert(0, HiddenField(key + "[]", sub_value))
-                else:
-                    current_form.questions.insert(0, HiddenField(key, value))
+        insert_hidden_fields(data, current_form)
 
         return (
             form_page(
@@ -158,16 +206,59 @@ def submit_paged_form(  # noqa
 
     # Add existing post data to new form as hidden fields
     post_data, _ = _prepare_data(request, {})
-    for key, value in post_data.items():
-        # If the keys value is a list, insert each individually
-        if isinstance(value, list):
-            for sub_value in value:
-                next_form.questions.insert(0, HiddenField(key + "[]", sub_value))
-        else:
-            next_form.questions.insert(0, HiddenField(key, value))
+    insert_hidden_fields(post_data, next_form)
 
     # Go to the next page
     return (
         form_page(request, next_form, data=data, extra_data={"form_pk": next_form.pk, **additional_context}),
         validated_data,
     )
+
+
+def _paged_form_flow_with_state(  # noqa
+    request, inject_data, additional_context, state_store, previous_form, current_form, next_form,
+):
+    """
+    The flow of submit_paged_form, keeping the answers given so far in state_store rather than in hidden fields
+    """
+    token, state = load_state(state_store, request)
+    state = {**(inject_data or {}), **state}
+    post_data, _ = _prepare_data(request, {})
+    extra_data = {"state_token": token, **additional_context}
+
+    if post_data.get("_action") == "back":
+        insert_state_token(previous_form, token)
+        return (
+            form_page(request, previous_form, data=state, extra_data={"form_pk": previous_form.pk, **extra_data}),
+            None,
+        )
+
+    data = merge_state(state, post_data, current_form)
+    state_store.save(request, token, data)
+
+    validated_data = yield nest_data(data)
+
+    errors = validated_data.get("errors")
+
+    if errors:
+        errors = flatten_data(errors)
+        errors = remove_unused_errors(errors, current_form)
+
+    if errors:
+        insert_state_token(current_form, token)
+        return (
+            form_page(
+                request, current_form, data=data, errors=errors, extra_data={"form_pk": current_form.pk, **extra_data},
+            ),
+            validated_data,
+        )
+
+    if next_form is None:
+        state_store.delete(request, token)
+        return None, validated_data
+
+    insert_state_token(next_form, token)
+    return (
+        form_page(request, next_form, data=data, extra_data={"form_pk": next_form.pk, **extra_data}),
+        validated_data,
+    )
@@ -8,6 +8,7 @@ from django.utils.safestring import mark_safe
 
 from core.builtins.custom_tags import get_const_string
 from lite_forms.helpers import convert_to_markdown, flatten_data
+from lite_forms.state import STATE_TOKEN
 
 
 @register.filter
@@ -21,6 +22,53 @@ def component_name(data, _object):
     return flatten_data(data).get(name)
 
 
+@register.simple_tag
+def resolve_component(component, data, errors):
+    """
+    Looks up a component's value and errors once, for use with render_component
+    """
+    from lite_forms.renderers import ResolvedComponent
+
+    return ResolvedComponent(component, data, errors)
+
+
+@register.simple_tag(takes_context=True)
+def render_component(context, field):
+    """
+    Renders a resolved component with the template registered for its input type
+    """
+    from lite_forms.renderers import render_component as _render_component
+
+    return _render_component(context, field)
+
+
+@register.simple_tag
+def render_tree(component, data):
+    """
+    Renders a TreeView's nodes
+    """
+    from lite_forms.renderers import render_tree_view
+
+    return render_tree_view(component, data)
+
+
+@register.filter
+def use_fast_renderer(form):
+    from lite_forms.renderers import use_fast_renderer as _use_fast_renderer
+
+    return _use_fast_renderer(form)
+
+
+@register.simple_tag(takes_context=True)
+def render_questions(context, questions, data, errors):
+    """
+    Renders a form's questions with the FastRenderer
+    """
+    from lite_forms.renderers import FastRenderer
+
+    return FastRenderer(context, data, errors).render(questions)
+
+
 @register.filter
 def key_value(dictionary, key):
     if not dictionary:
@@ -128,6 +176,14 @@ def dict_hidden_field(key, value):
     return f"<input type='hidden' name='{key}' value='{escape(str(value))}'>"
 
 
+@register.simple_tag
+def state_token_field(token):
+    """
+    Generates the hidden field for a wizard's state token
+    """
+    return dict_hidden_field(STATE_TOKEN, token)
+
+
 @register.filter
 def classname(obj):
     """
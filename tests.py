@@ -1,4 +1,20 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from copy import deepcopy
 from unittest import TestCase
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.exceptions import PermissionDenied
+from django.template import Context
+from django.template.loader import get_template
+from django.test import override_settings, RequestFactory
 
 from lite_forms.components import (
     Form,
@@ -14,6 +30,24 @@ from lite_forms.components import (
     HiddenField,
     NumberInput,
     RadioButtons,
+    Checkboxes,
+    EmailInput,
+    CurrencyInput,
+    TextArea,
+    Select,
+    FileUpload,
+    MultiFileUpload,
+    QuantityInput,
+    Summary,
+    List,
+    TokenBar,
+    Link,
+    WarningBanner,
+    TreeView,
+    TreeNode,
+    FormOverlay,
+    AutocompleteInput,
+    Group,
 )
 from lite_forms.helpers import (
     nest_data,
@@ -24,13 +58,91 @@ from lite_forms.helpers import (
     get_previous_form,
     convert_form_to_summary_list_instance,
     get_all_form_components,
+    get_form_component_index,
     insert_hidden_fields,
+    MarkdownCache,
+    compile_form,
+    heading_used_as_label,
+    get_summary_list_sections,
+    convert_dictionary_to_tree,
+    validate_data_unknown_async,
+)
+from lite_forms.renderers import (
+    ResolvedComponent,
+    COMPONENT_TEMPLATES,
+    register_component_template,
+    FastRenderer,
+    use_fast_renderer,
+    LocMemFragmentCache,
+    DjangoFragmentCache,
+    fragment_key,
+    set_fragment_cache,
+    use_streaming,
+    stream_template_chunks,
+    render_tree,
+    selected_keys,
+)
+from lite_forms.common import country_question, pv_grading_question
+from lite_forms.options import (
+    OptionIndex,
+    register_options,
+    get_option_index,
+    index_options,
+    Selection,
+    OptionSet,
+    ReferenceOptions,
+)
+from lite_forms.state import (
+    SessionStateStore,
+    CacheStateStore,
+    SQLiteStateStore,
+    load_state,
+    merge_state,
+    STATE_TOKEN,
+)
+from lite_forms.submitters import submit_paged_form
+from lite_forms.validation import ValidationCache
+from lite_forms.views import (
+    OptionSearchView,
+    TreeChildrenView,
+    SummaryListFormView,
+    AsyncSingleFormView,
+    AsyncMultiFormView,
+    AsyncSummaryListFormView,
 )
+from lite_forms.trees import TreeIndex, register_tree, get_tree_index, CompactTree
 from lite_forms.templatetags import custom_tags
 from lite_forms.templatetags.custom_tags import prefix_dots
 
 
 class FormTests(TestCase):
+    def test_components_are_slotted(self):
+        option = Option("a", "A", description="**A**")
+        self.assertFalse(hasattr(option, "__dict__"))
+        with self.assertRaises(AttributeError):
+            option.colour = "red"
+
+    def test_containers_accept_their_own_attributes(self):
+        form = Form(questions=[Group([TextInput("name")])])
+        form.licence_type = "open"
+        form.questions[0].colour = "red"
+        form_copy = deepcopy(form)
+
+        self.assertEqual(form_copy.licence_type, "open")
+        self.assertEqual(form_copy.questions[0].colour, "red")
+        self.assertEqual(FormOverlay(form).licence_type, "open")
+
+    def test_deepcopy(self):
+        form = Form(
+            title="Title", description="**Description**", questions=[Checkboxes("a", options=[Option("b", "B")])]
+        )
+        form_copy = deepcopy(form)
+        form_copy.questions[0].options[0].value = "C"
+        self.assertEqual(form_copy.description, form.description)
+        self.assertEqual(form_copy.title, "Title")
+        self.assertEqual(form.questions[0].options[0].value, "B")
+        self.assertFalse(hasattr(form_copy, "pk"))
+
     def test_get_form_by_pk(self):
         forms = FormGroup([Form(questions=[]), Form(questions=[]), Form(questions=[])])
 
@@ -46,6 +158,58 @@ class FormTests(TestCase):
 
         self.assertEqual(get_next_form(1, forms).pk, 2)
 
+    def test_form_group_ignores_empty_forms(self):
+        forms = FormGroup([Form(questions=[]), None, Form(questions=[])])
+
+        self.assertEqual(len(forms.forms), 2)
+        self.assertEqual(forms.get_form_index(1), 1)
+        self.assertIsNone(forms.get_form_index(2))
+        self.assertIsNone(get_next_form(1, forms))
+
+    def test_form_group_forms_is_a_list(self):
+        forms = FormGroup([Form(questions=[]), Form(questions=[])])
+        extra_forms = forms.forms + [Form(questions=[])]
+        forms.forms.append(Form(questions=[]))
+
+        self.assertEqual(len(extra_forms), 3)
+        self.assertEqual(len(forms.forms), 2)
+        self.assertIsNone(forms.get_form(1, 1))
+        self.assertIsNone(forms.get_form(0, -1))
+        self.assertIs(forms.get_form(0, 1), forms.forms[1])
+
+    def test_get_form_by_pk_does_not_change_original_form(self):
+        forms = FormGroup([Form(questions=[TextInput("name")]), Form(questions=[])])
+        form = get_form_by_pk(0, forms)
+        insert_hidden_fields({"matt": "berninger"}, form)
+        convert_form_to_summary_list_instance(form)
+
+        original_form = forms.forms[0]
+        self.assertEqual(len(form.questions), 3)
+        self.assertEqual(len(original_form.questions), 2)
+        self.assertEqual(form.buttons[0].value, "Save and return")
+        self.assertEqual(original_form.buttons[0].value, "Save")
+
+    def test_get_form_by_pk_copies_components(self):
+        forms = FormGroup([Form(questions=[Checkboxes("colours", [Option("red", "Red")])])])
+        compile_form(forms.forms[0])
+        form = get_form_by_pk(0, forms)
+        form.questions[0].options[0].value = "Blue"
+        form.questions[0].options.append(Option("green", "Green"))
+
+        self.assertNotIsInstance(form, FormOverlay)
+        self.assertEqual(forms.forms[0].questions[0].options[0].value, "Red")
+        self.assertEqual(len(forms.forms[0].questions[0].options), 1)
+        self.assertEqual(get_form_component_index(form)["colours"], form.questions[0])
+
+    def test_get_form_by_pk_returns_an_overlay_with_the_setting(self):
+        forms = FormGroup([Form(questions=[TextInput("name")])])
+        with override_settings(LITE_FORMS_FORM_OVERLAYS=True):
+            form = get_form_by_pk(0, forms)
+
+        self.assertIsInstance(form, FormOverlay)
+        self.assertEqual(custom_tags.classname(form), "Form")
+        self.assertIs(form.questions[0], forms.forms[0].questions[0])
+
     def test_classname(self):
         expected_value = "type"
         actual_value = custom_tags.classname(TestCase)
@@ -70,6 +234,48 @@ class FormTests(TestCase):
 
         self.assertEqual(cleaned_errors, remove_unused_errors(errors, form))
 
+    def test_remove_unused_errors_for_lists_and_dates(self):
+        form = Form(
+            questions=[
+                Checkboxes("goods[]", options=[]),
+                TokenBar("tags[]", options=[]),
+                DateInput(prefix="date_", name="date"),
+            ]
+        )
+        errors = {
+            "goods": ["Select a good"],
+            "goods[]": ["Select a good"],
+            "tags": ["Enter a tag"],
+            "date": ["Enter a date"],
+            "date_day": ["Enter a day"],
+            "email": ["Enter an email"],
+        }
+
+        # Date parts and the "[]" names of other lists are dropped, and checkboxes keep their error without "[]"
+        self.assertEqual(
+            remove_unused_errors(errors, form), {"goods": ["Select a good"], "date": ["Enter a date"]},
+        )
+        self.assertEqual(remove_unused_errors({"goods[]": ["Select a good"]}, form), {"goods[]": ["Select a good"]})
+
+    def test_remove_unused_errors_keeps_the_order_of_fields(self):
+        form = Form(
+            questions=[TextInput("name"), RadioButtons("band", [Option("x", "X", components=[TextInput("other")])])]
+        )
+        errors = {"other": ["Enter a band"], "non_field_errors": ["Error"], "band": ["Select a band"], "name": ""}
+
+        self.assertEqual(
+            list(remove_unused_errors(errors, form).items()),
+            [("non_field_errors", ["Error"]), ("band", ["Select a band"]), ("other", ["Enter a band"])],
+        )
+
+    def test_component_index_is_rebuilt_when_fields_are_added(self):
+        form = Form(questions=[TextInput("name")])
+        self.assertNotIn("age", get_form_component_index(form))
+
+        insert_hidden_fields({"age": "3"}, form)
+        self.assertIn("age", get_form_component_index(form))
+        self.assertEqual(remove_unused_errors({"age": ["Enter an age"]}, form), {"age": ["Enter an age"]})
+
     def test_nest_data(self):
         value = {
             "reference": "conversation_16",
@@ -116,6 +322,16 @@ class FormTests(TestCase):
             },
         )
 
+    def test_flatten_data_with_separator_and_cache(self):
+        value = {"site": {"name": "SITE1", "address": {"city": "London"}}, "reference": "1"}
+        cache = {}
+
+        data = flatten_data(value, sep="__", cache=cache)
+
+        self.assertEqual(data, {"site__name": "SITE1", "site__address__city": "London", "reference": "1"})
+        self.assertIs(flatten_data(value, sep="__", cache=cache), data)
+        self.assertEqual(flatten_data(value, cache=cache)["site.address.city"], "London")
+
     def test_convert_form_to_summary_list_instance(self):
         form = Form(title="I Am Easy to Find", caption="The National", default_button_name="Rylan")
         form = convert_form_to_summary_list_instance(form)
@@ -139,11 +355,125 @@ class FormTests(TestCase):
         components = get_all_form_components(form)
         self.assertEqual(len(components), 3)
 
+    def test_compile_form(self):
+        form = Form(
+            questions=[
+                Checkboxes("goods[]", options=[Option("a", "A", components=[TextInput("other")])]),
+                DateInput(prefix="date_", name="date"),
+                TextInput("name"),
+            ]
+        )
+        schema = compile_form(form)
+
+        self.assertIs(compile_form(form), schema)
+        self.assertIs(compile_form(schema), schema)
+        self.assertEqual(len(schema.components), 4)
+        self.assertEqual(schema.list_fields, {"goods"})
+        self.assertEqual(schema.date_prefixes, ("date_",))
+        self.assertEqual(schema.javascript_imports, {"/javascripts/select-links.js"})
+        self.assertIsNone(heading_used_as_label(schema))
+        self.assertEqual(get_all_form_components(schema), get_all_form_components(form))
+
+    def test_form_group_recompiles_forms(self):
+        form = Form(questions=[TextInput("name")])
+        compile_form(form)
+        FormGroup([form])
+
+        self.assertIn("form_pk", compile_form(form).component_index)
+
+    def test_form_groups_share_forms(self):
+        first, second = Form(questions=[TextInput("name")]), Form(questions=[TextInput("age")])
+        FormGroup([first, second])
+        schema = compile_form(second)
+        FormGroup([second, first])
+
+        self.assertEqual([x.name for x in second.questions].count("form_pk"), 1)
+        self.assertIs(compile_form(second), schema)
+        self.assertEqual(second.pk, 0)
+        self.assertEqual(schema.component_index["form_pk"].value, 0)
+
+    def test_overlays_are_compiled_with_their_own_questions(self):
+        form = Form(questions=[TextInput("name")])
+        schema = compile_form(form)
+        overlay = FormOverlay(form)
+        self.assertIs(compile_form(overlay), schema)
+
+        overlay.questions.append(TextInput("age"))
+        errors = remove_unused_errors({"name": ["Enter a name"], "age": ["Enter an age"]}, overlay)
+
+        self.assertEqual(errors, {"name": ["Enter a name"], "age": ["Enter an age"]})
+        self.assertIs(compile_form(form), schema)
+        self.assertNotIn("age", get_form_component_index(form))
+
+    def test_forms_are_compiled_again_when_questions_are_set(self):
+        form = Form(questions=[TextInput("name")])
+        compile_form(form)
+        form.questions = [TextInput("age")]
+
+        self.assertEqual(list(get_form_component_index(form)), ["age"])
+
     def test_insert_hidden_fields(self):
         form = Form(title="I Am Easy to Find", questions=[],)
         insert_hidden_fields({"matt": "berninger"}, form)
         self.assertEqual(len(form.questions), 1)
 
+    def test_insert_hidden_fields_skips_existing_fields(self):
+        # Fields nested in options and the parts of dates are skipped too, unlike before forms had a component index
+        form = Form(
+            questions=[
+                RadioButtons("band", options=[Option("other", "Other", components=[TextInput("other_band")])]),
+                Checkboxes("members[]", options=[]),
+                DateInput(prefix="formed_", name="formed"),
+            ]
+        )
+        data = {"band": "other", "other_band": "The National", "members": [], "formed_year": "1999", "album": "Boxer"}
+        insert_hidden_fields(data, form)
+        self.assertEqual([question.name for question in form.questions], ["album", "band", "members[]", "formed"])
+
+    def test_submit_paged_form_carries_data_over_as_hidden_fields(self):
+        forms = FormGroup([Form(questions=[TextInput("name"), DateInput(prefix="date_")]), Form(questions=[])])
+        request = RequestFactory().post(
+            "/", {"form_pk": "0", "a": "1", "name": "Matt", "b[]": ["2", "3"], "date_day": "01"}
+        )
+        with patch("lite_forms.submitters.form_page") as form_page:
+            submit_paged_form(request, forms, lambda request, data: ({"errors": {"name": ["Enter a name"]}}, 200))
+
+        _, form = form_page.call_args[0]
+        self.assertEqual(
+            [(question.name, question.value) for question in form.questions[:3]],
+            [("b[]", "3"), ("b[]", "2"), ("a", "1")],
+        )
+        self.assertEqual(len(form.questions), 6)
+        self.assertEqual(len(forms.forms[0].questions), 3)
+
+    def test_get_summary_list_sections(self):
+        forms = FormGroup(
+            [
+                Form(
+                    title="Band",
+                    questions=[
+                        TextInput("band.name", title="Name"),
+                        RadioButtons(
+                            "genre",
+                            title="Genre",
+                            options=[Option("other", "Other", components=[TextInput("other_genre")])],
+                        ),
+                    ],
+                ),
+                Form(title="Members", questions=[TextInput("members", title="Members", short_title="Who")]),
+            ]
+        )
+        data = {"band": {"name": "The National"}, "genre": "other", "other_genre": "Indie", "members": "Five"}
+
+        sections = get_summary_list_sections(forms, data, data, hide_components=["genre"])
+
+        self.assertEqual([row.value for row in sections[0].rows], ["The National"])
+        self.assertEqual(sections[1].rows[0].title, "Who")
+
+        sections = get_summary_list_sections(forms, data, data)
+
+        self.assertEqual(sections[0].rows[1].details, [("Indie", "Indie")])
+
 
 class TemplateTagsTestCase(TestCase):
     def test_prefix_dots(self):
@@ -153,6 +483,745 @@ class TemplateTagsTestCase(TestCase):
         self.assertEqual(r"mid\\.dot", prefix_dots("mid.dot"))
         self.assertEqual(r"\\.all\\.the\\.dots\\.", prefix_dots(".all.the.dots."))
 
+    def test_state_token_field(self):
+        with patch("lite_forms.templatetags.custom_tags.STATE_TOKEN", "_wizard"):
+            self.assertEqual(custom_tags.state_token_field("abc"), "<input type='hidden' name='_wizard' value='abc'>")
+
+
+class RenderersTest(TestCase):
+    def test_resolved_component(self):
+        field = ResolvedComponent(Checkboxes("goods[]", options=[]), {"goods": '["a"]'}, {"goods": ["Select a good"]})
+        self.assertEqual(field.value, ["a"])
+        self.assertEqual(field.error, ["Select a good"])
+        self.assertTrue(field.has_error)
+
+    def test_resolved_date_component(self):
+        field = ResolvedComponent(DateInput(prefix="date_"), {}, {"date_month": ["Enter a month"]})
+        self.assertTrue(field.has_error)
+
+    def test_register_component_template(self):
+        register_component_template("rating", "components/rating.html")
+        self.addCleanup(COMPONENT_TEMPLATES.pop, "rating")
+        field = ResolvedComponent(Label("abc"), {}, {})
+        self.assertEqual(COMPONENT_TEMPLATES["rating"].get_context(field), {"component": field.component})
+
+
+class FastRendererTest(TestCase):
+    def assertRendersLikeTemplate(self, question, data, errors):
+        def normalise(html):
+            return re.sub(r"\s+", " ", re.sub(r"\s*(<|>)\s*", r"\1", html)).strip()
+
+        template = get_template("components.html").template.render(
+            Context({"question": question, "data": data, "errors": errors})
+        )
+        fast = FastRenderer(Context(), data, errors).render([question])
+        self.assertEqual(normalise(fast), normalise(template))
+
+    def test_text_input(self):
+        self.assertRendersLikeTemplate(
+            TextInput("name", title="Name", optional=True), {"name": "<b>"}, {"name": ["Enter a name"]}
+        )
+
+    def test_radiobuttons_with_conditional_components(self):
+        question = RadioButtons(
+            "kind",
+            options=[Option("other", "Other", components=[TextInput("other_kind")]), Option("a", "A", show_or=True)],
+        )
+        self.assertRendersLikeTemplate(question, {"kind": "other", "other_kind": "x"}, {"other_kind": ["Enter"]})
+
+    def test_checkboxes(self):
+        question = Checkboxes("goods[]", options=[Option("a", "A b", description="c")], show_select_links=True)
+        self.assertRendersLikeTemplate(question, {"goods": ["a"]}, {})
+
+    def test_date_input(self):
+        self.assertRendersLikeTemplate(DateInput(prefix="date_", title="Date"), {"date_day": "1"}, {"date_day": ["No"]})
+
+    def test_hidden_field(self):
+        self.assertRendersLikeTemplate(HiddenField("a", "b"), None, None)
+
+    def test_component_types(self):
+        options = [Option("gb", "United Kingdom", classes=["c"]), Option("fr", "France")]
+        questions = [
+            EmailInput("email"),
+            CurrencyInput("value"),
+            TextArea("details", extras={"max_length": 100}, data_attributes={"x": "y"}),
+            NumberInput("count"),
+            Select("country", options=options),
+            FileUpload("file"),
+            MultiFileUpload("files"),
+            QuantityInput("quantity"),
+            Summary(values={"a": "**b**"}),
+            List(["a", "b"], type=List.ListType.BULLETED),
+            Label("Some **text**"),
+            TokenBar("cles", options=options),
+            Link("Go", "/go", name="go"),
+            WarningBanner("warning", "Careful"),
+            TreeView("tree", convert_dictionary_to_tree({"Group": [{"key": "a", "value": "A"}]})),
+            AutocompleteInput("a.b", options=options),
+            Group([TextInput("g1"), TextInput("g2")], classes=["group"]),
+        ]
+        data = {"email": "a@b.c", "country": "fr", "file": "a.pdf", "cles": ["gb"], "tree": ["a"], "a.b": "gb"}
+        for question in questions:
+            with self.subTest(input_type=question.input_type):
+                self.assertRendersLikeTemplate(question, data, {"count": ["Enter a number"], "g1": ["Enter"]})
+
+    def test_stream(self):
+        questions = [Label("Some text"), TextInput("name")]
+        chunks = list(FastRenderer(Context(), {"name": "Matt"}, {}).stream(questions))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual("".join(chunks), FastRenderer(Context(), {"name": "Matt"}, {}).render(questions))
+
+    def test_stream_questions_with_templates(self):
+        questions = [Label("Some text"), TextInput("name")]
+        context = Context({"data": {"name": "Matt"}, "errors": {}})
+        with context.bind_template(get_template("components.html").template):
+            chunks = list(stream_template_chunks(context, "form-question.html", "question", questions))
+        self.assertEqual(len(chunks), 2)
+        self.assertIn("Some text", chunks[0])
+        self.assertIn('value="Matt"', chunks[1])
+
+    def test_use_streaming(self):
+        self.assertFalse(use_streaming())
+        self.assertTrue(use_streaming(True))
+
+        with override_settings(LITE_FORMS_STREAMING=True):
+            self.assertTrue(use_streaming())
+            self.assertFalse(use_streaming(False))
+
+    def test_use_fast_renderer(self):
+        self.assertFalse(use_fast_renderer(Form()))
+        self.assertTrue(use_fast_renderer(Form(fast_render=True)))
+
+        with override_settings(LITE_FORMS_FAST_RENDERER=True):
+            self.assertTrue(use_fast_renderer(Form()))
+            self.assertFalse(use_fast_renderer(Form(fast_render=False)))
+
+
+class TreeRendererTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tree_view = TreeView(
+            "cles",
+            convert_dictionary_to_tree(
+                {
+                    "Military": [
+                        {"key": "ML1", "value": "ML1", "children": [{"key": "ML1a", "value": "ML1a"}]},
+                        {"key": "ML2", "value": "ML2", "children": [{"key": "ML2a", "value": "ML2a"}]},
+                    ],
+                    "Dual use": [{"key": "1A001", "value": "1A001"}],
+                }
+            ),
+        )
+
+    def test_renders_like_node_template(self):
+        def normalise(html):
+            return re.sub(r"\s+", " ", re.sub(r"\s*(<|>)\s*", r"\1", html)).strip()
+
+        selected = ["ML1a", {"rating": "1A001"}]
+        template = get_template("components/node.html").template.render(
+            Context({"data": selected, "tree_data": self.tree_view.data, "component": self.tree_view})
+        )
+        html = render_tree(self.tree_view.name, self.tree_view.data, selected)
+        self.assertEqual(normalise(html), normalise(template))
+
+    def test_skip_collapsed(self):
+        html = render_tree(self.tree_view.name, self.tree_view.data, ["ML1a"], skip_collapsed=True)
+        self.assertIn('id="node-ML1a"', html)
+        self.assertIn('id="node-ML2"', html)
+        self.assertNotIn('id="node-ML2a"', html)
+        self.assertNotIn('id="node-1A001"', html)
+
+    def test_lazy_depth(self):
+        html = render_tree(
+            self.tree_view.name, self.tree_view.data, ["ML1a"], max_depth=2, children_url="/trees/cles/children/"
+        )
+        self.assertIn('id="node-ML1a"', html)
+        self.assertIn('data-children-url="/trees/cles/children/?key=ML2&amp;name=cles"', html)
+        self.assertNotIn('id="node-ML2a"', html)
+        self.assertIn('id="node-1A001"', html)
+
+    def test_tree_index(self):
+        index = TreeIndex(self.tree_view.data)
+        self.assertEqual([node.key for node in index.children("ML1")], ["ML1a"])
+        self.assertEqual([node.value for node in index.children()], ["Military", "Dual use"])
+        self.assertEqual(index.children("Dual use")[0].key, "1A001")
+        with self.assertRaises(KeyError):
+            index.children("ML3")
+
+    def test_register_tree(self):
+        register_tree("test-tree", lambda: self.tree_view.data.children)
+        register_tree("test-tree", [], replace=False)
+        self.assertEqual(get_tree_index("test-tree").get("ML2a").value, "ML2a")
+        self.assertIs(get_tree_index("test-tree"), get_tree_index("test-tree"))
+
+    def test_lazy_tree_views_are_registered_by_content(self):
+        first = TreeView("cles", [TreeNode("ML1", "ML1", [TreeNode("ML1a", "ML1a")])], lazy_depth=1)
+        second = TreeView("cles", [TreeNode("ML1", "ML1", [TreeNode("ML1b", "ML1b")])], lazy_depth=1)
+        again = TreeView("cles", [TreeNode("ML1", "ML1", [TreeNode("ML1a", "ML1a")])], lazy_depth=1)
+
+        self.assertNotEqual(first.tree_id, second.tree_id)
+        self.assertEqual(first.tree_id, again.tree_id)
+        self.assertEqual(get_tree_index(first.tree_id).children("ML1")[0].key, "ML1a")
+        self.assertEqual(get_tree_index(second.tree_id).children("ML1")[0].key, "ML1b")
+
+        named = TreeView("cles", first.data.children, lazy_depth=1, tree_id="test-named-tree")
+        TreeView("cles", second.data.children, lazy_depth=1, tree_id="test-named-tree")
+        self.assertEqual(named.tree_id, "test-named-tree")
+        self.assertEqual(get_tree_index("test-named-tree").children("ML1")[0].key, "ML1b")
+
+    def test_compact_tree(self):
+        tree = CompactTree.from_dictionary(
+            {
+                "Military": [
+                    {"key": "ML1", "value": "ML1", "children": [{"key": "ML1a", "value": "ML1a"}]},
+                    {"key": "ML2", "value": "ML2", "children": [{"key": "ML2a", "value": "ML2a"}]},
+                    {"key": "ML3", "value": "ML3", "excluded": True},
+                ],
+                "Dual use": [{"key": "1A001", "value": "1A001"}],
+            },
+            exclude="excluded",
+        )
+        compact_tree_view = TreeView("cles", tree)
+        self.assertEqual(len(tree), 7)
+        self.assertEqual([node.value for node in compact_tree_view.data.children], ["Military", "Dual use"])
+        self.assertEqual(
+            render_tree("cles", compact_tree_view.data, ["ML1a"], skip_collapsed=True),
+            render_tree("cles", self.tree_view.data, ["ML1a"], skip_collapsed=True),
+        )
+        self.assertEqual(TreeIndex(compact_tree_view.data).children("ML2")[0].value, "ML2a")
+
+    def test_selected_keys(self):
+        self.assertEqual(selected_keys(["a", {"rating": "b"}]), {"a", "b"})
+        self.assertEqual(selected_keys(None), set())
+
+
+class OptionSearchTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.options = [
+            Option("GB", "United Kingdom"),
+            Option("FR", "France"),
+            Option("UA", "Ukraine"),
+            Option("US", "United States"),
+            Option("UM", "United States Minor Outlying Islands"),
+        ]
+        self.index = OptionIndex(self.options)
+
+    def test_prefix_matches_come_first(self):
+        self.assertEqual(
+            [option.key for option in self.index.search("united")], ["GB", "US", "UM"],
+        )
+        self.assertEqual([option.key for option in self.index.search("u")], ["UA", "UM", "GB", "US"])
+
+    def test_substring_matches(self):
+        self.assertEqual([option.key for option in self.index.search("states")], ["US", "UM"])
+        self.assertEqual([option.key for option in self.index.search("ANC")], ["FR"])
+        self.assertEqual(self.index.search("xyz"), [])
+        self.assertEqual(self.index.search(" "), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.search("u", limit=2)), 2)
+        self.assertEqual(self.index.search("u", limit=0), [])
+
+    def test_get(self):
+        self.assertEqual(self.index.get("FR").value, "France")
+        self.assertIsNone(self.index.get("DE"))
+
+    def test_prefix_search(self):
+        self.assertEqual([option.key for option in self.index.prefix_search("United S")], ["US", "UM"])
+        self.assertEqual([option.key for option in self.index.prefix_search("u", limit=2)], ["UA", "UM"])
+
+    def test_token_search(self):
+        self.assertEqual([option.key for option in self.index.token_search("stat unit")], ["US", "UM"])
+        self.assertEqual([option.key for option in self.index.token_search("king")], ["GB"])
+        self.assertEqual(self.index.token_search("nited"), [])
+
+    def test_index_options_is_reused_for_the_same_options(self):
+        options = [Option("GB", "United Kingdom", classes=["flag"]), Option("FR", "France")]
+        index = index_options(self.options)
+        self.assertIs(index_options(self.options)._keys, index._keys)
+        self.assertIsNot(index_options(options)._keys, index._keys)
+        self.assertEqual(index_options(options).get("GB").classes, ["flag"])
+        self.assertEqual(Select("country", options).option_index.get("FR").value, "France")
+
+    def test_selection_matches_key_in_array(self):
+        for data in [None, "GB", ["GB", "FR"], [{"id": "GB"}], {"key": "GB"}, True]:
+            selection = Selection(data)
+            for key in ["GB", "US", True]:
+                self.assertEqual(key in selection, custom_tags.key_in_array(data, key), (data, key))
+
+    def test_register_options(self):
+        register_options("test-countries", lambda: self.options)
+        register_options("test-countries", [], replace=False)
+        self.assertEqual(get_option_index("test-countries").get("UA").value, "Ukraine")
+        self.assertIs(get_option_index("test-countries"), get_option_index("test-countries"))
+
+    def test_remote_components_with_the_same_name_search_their_own_options(self):
+        first = AutocompleteInput("country", [Option("GB", "United Kingdom")], remote=True)
+        second = AutocompleteInput("country", [Option("GB", "Great Britain")], remote=True)
+        self.assertNotEqual(first.search_id, second.search_id)
+
+        view = OptionSearchView.as_view()
+        for component, value in [(first, "United Kingdom"), (second, "Great Britain")]:
+            request = RequestFactory().get("/", {"q": "g"})
+            request.user = User()
+            response = view(request, search_id=component.search_id)
+            self.assertEqual(json.loads(response.content), [{"key": "GB", "value": value}])
+
+    def test_registries_are_only_served_to_logged_in_users(self):
+        register_options("test-countries", self.options)
+        register_tree("test-tree", [TreeNode("a", "A")])
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+
+        with self.assertRaises(PermissionDenied):
+            OptionSearchView.as_view()(request, search_id="test-countries")
+        with self.assertRaises(PermissionDenied):
+            TreeChildrenView.as_view()(request, tree_id="test-tree")
+
+    def test_remote_components_render_selected_options_only(self):
+        autocomplete = AutocompleteInput("country", self.options, remote=True, search_url="/countries/")
+        token_bar = TokenBar("countries", self.options, remote=True, search_url="/countries/", debounce=500)
+        register_options("country", self.options)
+        register_options("countries", self.options)
+
+        context = Context()
+        with context.bind_template(get_template("components.html").template):
+            html = FastRenderer(context, {"country": "FR", "countries": ["UA"]}, None).render([autocomplete, token_bar])
+        self.assertIn('<option value="FR" selected>France</option>', html)
+        self.assertNotIn("United Kingdom", html)
+        self.assertIn("{key: 'UA', value: 'Ukraine'}", html)
+        self.assertIn("delay: 500", html)
+        self.assertIn('"/countries/"', html)
+
+
+class OptionSetTest(TestCase):
+    def test_option_sets_with_the_same_content_are_shared(self):
+        first = OptionSet([Option("GB", "United Kingdom", description="**UK**"), Option("FR", "France")])
+        second = OptionSet([Option("GB", "United Kingdom", description="**UK**"), Option("FR", "France")])
+        different = OptionSet([Option("GB", "United Kingdom"), Option("FR", "France")])
+        self.assertIs(first, second)
+        self.assertIsNot(first, different)
+        self.assertIs(deepcopy(first), first)
+        self.assertIs(index_options(first), first.index)
+        self.assertEqual(first.index.get("FR").value, "France")
+
+    def test_from_items(self):
+        option_set = OptionSet.from_items([{"id": "GB", "name": "United Kingdom"}, {"id": "FR", "name": "France"}])
+        self.assertEqual(
+            [(option.key, option.value) for option in option_set], [("GB", "United Kingdom"), ("FR", "France")]
+        )
+
+    def test_options_with_components_are_not_shared(self):
+        options = [Option("yes", "Yes", components=[TextInput("details")])]
+        self.assertIsNot(OptionSet(options), OptionSet(options))
+
+    def test_reference_options_are_fetched_once_until_refreshed(self):
+        fetches = []
+
+        def fetch():
+            fetches.append(True)
+            return [Option("GB", "United Kingdom")]
+
+        countries = ReferenceOptions(fetch)
+        self.assertIs(countries(), countries())
+        self.assertEqual(len(fetches), 1)
+        countries.refresh()
+        countries()
+        self.assertEqual(len(fetches), 2)
+
+        expiring = ReferenceOptions(fetch, ttl=0)
+        expiring()
+        expiring()
+        self.assertEqual(len(fetches), 4)
+
+    def test_common_questions_share_options(self):
+        countries = ReferenceOptions(lambda: [Option("GB", "United Kingdom")])
+        self.assertIs(country_question(countries).options, country_question(countries).options)
+        self.assertIs(
+            pv_grading_question([Option("official", "Official")]).options,
+            pv_grading_question([Option("official", "Official")]).options,
+        )
+
+
+class WizardStateTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.request = RequestFactory().post("/", {STATE_TOKEN: "token", "name": "Matt"})
+        self.request.session = SessionStore()
+
+    def check_store(self, store):
+        self.assertIsNone(store.load(self.request, "token"))
+        store.save(self.request, "token", {"name": "Matt", "countries": ["GB", "FR"]})
+        self.assertEqual(store.load(self.request, "token"), {"name": "Matt", "countries": ["GB", "FR"]})
+        self.assertEqual(load_state(store, self.request), ("token", {"name": "Matt", "countries": ["GB", "FR"]}))
+
+        other_request = RequestFactory().post("/", {STATE_TOKEN: "token"})
+        other_request.session = SessionStore()
+        other_request.session.create()
+        self.assertIsNone(store.load(other_request, "token"))
+        token, data = load_state(store, other_request)
+        self.assertNotEqual(token, "token")
+        self.assertEqual(data, {})
+
+        store.delete(self.request, "token")
+        self.assertIsNone(store.load(self.request, "token"))
+
+    def test_session_store(self):
+        self.check_store(SessionStateStore())
+
+    def test_cache_store(self):
+        self.check_store(CacheStateStore())
+
+    def test_sqlite_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.check_store(SQLiteStateStore(os.path.join(directory, "state.sqlite3")))
+
+    def test_session_store_keeps_latest_states(self):
+        store = SessionStateStore(max_states=2)
+        for token in ["first", "second", "third"]:
+            store.save(self.request, token, {})
+        self.assertIsNone(store.load(self.request, "first"))
+        self.assertEqual(store.load(self.request, "third"), {})
+
+    def test_merge_state_clears_the_forms_fields(self):
+        form = Form(questions=[TextInput("name"), Checkboxes("countries[]", options=[Option("GB", "United Kingdom")])])
+        state = {"name": "Matt", "countries": ["GB"], "colour": "Red"}
+        self.assertEqual(
+            merge_state(state, {"name": "Matthew", STATE_TOKEN: "token"}, form), {"name": "Matthew", "colour": "Red"}
+        )
+        self.assertEqual(merge_state(state, {"_action": "change"}), {**state, "_action": "change"})
+
+
+class ValidationCacheTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.request = RequestFactory().post("/")
+        self.request.session = SessionStore()
+        self.request.session.create()
+
+    def action(self, request, *args):
+        data = args[-1]
+        self.calls.append(data)
+        return {"errors": {"name": ["Enter a name"]}} if not data.get("name") else {"name": data["name"]}, None
+
+    def test_same_data_is_only_validated_once(self):
+        cache = ValidationCache()
+        self.assertEqual(
+            cache.validate(self.request, self.action, None, {"name": "Matt", "site": {"id": 1}}), {"name": "Matt"}
+        )
+        self.assertEqual(
+            cache.validate(self.request, self.action, None, {"site": {"id": 1}, "name": "Matt"}), {"name": "Matt"}
+        )
+        self.assertEqual(len(self.calls), 1)
+
+        cache.validate(self.request, self.action, None, {"name": ""})
+        cache.validate(self.request, self.action, "1", {"name": "Matt", "site": {"id": 1}})
+        self.assertEqual(len(self.calls), 3)
+
+    def test_results_are_per_session(self):
+        cache = ValidationCache()
+        other_request = RequestFactory().post("/")
+        other_request.session = SessionStore()
+        other_request.session.create()
+
+        cache.validate(self.request, self.action, None, {"name": "Matt"})
+        cache.validate(other_request, self.action, None, {"name": "Matt"})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_requests_without_a_session_are_always_validated(self):
+        cache = ValidationCache()
+        first_request = RequestFactory().post("/")
+        second_request = RequestFactory().post("/")
+
+        def other_action(request, data):
+            self.calls.append(data)
+            return {"errors": {"name": ["Name taken"]}}, None
+
+        self.assertEqual(cache.validate(first_request, self.action, None, {"name": "Matt"}), {"name": "Matt"})
+        self.assertEqual(
+            cache.validate(second_request, other_action, None, {"name": "Matt"}), {"errors": {"name": ["Name taken"]}}
+        )
+        cache.validate(second_request, self.action, "1", {"name": "Matt"})
+        cache.validate(second_request, self.action, "1", {"name": "Matt"})
+        self.assertEqual(len(self.calls), 4)
+
+    def test_invalidate(self):
+        cache = ValidationCache()
+        cache.validate(self.request, self.action, None, {"name": "Matt"})
+        cache.invalidate(self.request)
+        cache.validate(self.request, self.action, None, {"name": "Matt"})
+        self.assertEqual(len(self.calls), 2)
+
+    def test_timeout(self):
+        cache = ValidationCache(timeout=0)
+        cache.validate(self.request, self.action, None, {"name": "Matt"})
+        cache.validate(self.request, self.action, None, {"name": "Matt"})
+        self.assertEqual(len(self.calls), 2)
+
+
+class StepValidationTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.forms = FormGroup(
+            [
+                Form("Name", questions=[TextInput("name"), TextInput("site.name")]),
+                Form("Goods", questions=[Checkboxes("goods[]", options=[]), TextInput("quantity")]),
+            ]
+        )
+        self.data = {
+            "name": "Matt",
+            "site.name": "HQ",
+            "site.address": "London",
+            "goods": ["a"],
+            "quantity": "1",
+            "validate_only": True,
+        }
+
+    def action(self, request, data):
+        self.calls.append(data)
+        return data, 200
+
+    def build_view(self, **kwargs):
+        view = SummaryListFormView(forms=self.forms, action=self.action, **kwargs)
+        view._validated_data = self.data
+        return view
+
+    def test_everything_is_validated_by_default(self):
+        view = self.build_view()
+        self.assertEqual(view.get_form_data(self.forms.forms[1]), self.data)
+
+        view.validate_form_data(RequestFactory().post("/"), nest_data(view.get_form_data(self.forms.forms[1])))
+        self.assertEqual(self.calls, [nest_data(self.data)])
+
+    def test_only_the_current_forms_fields_are_validated(self):
+        view = self.build_view(validate_current_form_only=True)
+        self.assertEqual(
+            view.get_form_data(self.forms.forms[1]),
+            {"goods": ["a"], "quantity": "1", "validate_only": True, "validate_step": 1},
+        )
+        self.assertEqual(
+            view.get_form_data(self.forms.forms[0]),
+            {"name": "Matt", "site.name": "HQ", "validate_only": True, "validate_step": 0},
+        )
+
+    def test_form_dependencies_are_validated_with_the_form(self):
+        view = self.build_view(validate_current_form_only=True, form_dependencies={1: ["site"]})
+        self.assertEqual(
+            view.get_form_data(self.forms.forms[1]),
+            {
+                "site.name": "HQ",
+                "site.address": "London",
+                "goods": ["a"],
+                "quantity": "1",
+                "validate_only": True,
+                "validate_step": 1,
+            },
+        )
+
+
+class ConcurrentValidationTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.active = 0
+        self.most_active = 0
+        self.lock = threading.Lock()
+        self.forms = FormGroup(
+            [
+                Form("Name", questions=[TextInput("name")]),
+                Form("Goods", questions=[TextInput("quantity")]),
+                Form("Site", questions=[TextInput("site")]),
+            ]
+        )
+
+    def action(self, request, data):
+        with self.lock:
+            self.calls.append(data)
+            self.active += 1
+            self.most_active = max(self.most_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+
+        errors = {key: ["Enter a value"] for key in ["name", "quantity", "site"] if data.get(key) == ""}
+        if errors:
+            # Errors for fields on other forms are ignored
+            return {"errors": {**errors, "other": ["Not on this form"]}}, 400
+        return data, 200
+
+    def build_view(self, **kwargs):
+        test = self
+
+        class View(SummaryListFormView):
+            def init(self, request, **kwargs):
+                self.forms = test.forms
+                self.action = test.action
+
+        view = View(validate_forms_concurrently=True, success_url="/done", **kwargs)
+        view.kwargs = {}
+        view.init(None)
+        return view
+
+    def post(self, view, data):
+        request = RequestFactory().post("/", {**data, "_action": "finish"})
+        view.request = request
+        with patch("lite_forms.views.form_page") as form_page:
+            return view._post(request), form_page
+
+    def test_forms_are_validated_concurrently(self):
+        view = self.build_view(max_concurrent_validations=2)
+        view._validated_data = {"name": "", "quantity": "1", "site": ""}
+
+        self.assertEqual(
+            view.validate_forms(RequestFactory().post("/")),
+            {0: {"name": ["Enter a value"]}, 2: {"site": ["Enter a value"]}},
+        )
+        self.assertEqual(self.most_active, 2)
+        self.assertEqual(
+            sorted(self.calls, key=lambda data: data["validate_step"]),
+            [
+                {"name": "", "validate_only": True, "validate_step": 0},
+                {"quantity": "1", "validate_only": True, "validate_step": 1},
+                {"site": "", "validate_only": True, "validate_step": 2},
+            ],
+        )
+
+    def test_validate_steps(self):
+        view = self.build_view()
+        results = view.validate_steps(RequestFactory().post("/"), {0: {"name": "Matt"}, 1: {"quantity": ""}})
+        self.assertEqual(results[0], {"name": "Matt"})
+        self.assertIn("errors", results[1])
+
+    def test_user_is_sent_to_the_first_form_with_errors(self):
+        view = self.build_view()
+        questions = list(self.forms.forms[1].questions)
+        response, form_page = self.post(view, {"name": "Matt", "quantity": "", "site": ""})
+
+        self.assertIs(response, form_page.return_value)
+        _, form = form_page.call_args[0]
+        self.assertIsNot(form, self.forms.forms[1])
+        self.assertEqual(form.pk, 1)
+        self.assertEqual(form.buttons[0].action, "return")
+        self.assertEqual(form_page.call_args[1]["errors"], {"quantity": ["Enter a value"]})
+        # The shared form is unchanged
+        self.assertEqual(self.forms.forms[1].questions, questions)
+        self.assertNotEqual(self.forms.forms[1].buttons[0].action, "return")
+
+    def test_forms_are_only_validated_separately_when_submitting_everything_fails(self):
+        response, form_page = self.post(self.build_view(), {"name": "Matt", "quantity": "1", "site": "HQ"})
+
+        self.assertEqual(response.url, "/done")
+        form_page.assert_not_called()
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.calls[0]["validate_only"], False)
+        self.assertEqual([self.calls[0][key] for key in ["name", "quantity", "site"]], ["Matt", "1", "HQ"])
+
+        self.calls.clear()
+        self.post(self.build_view(), {"name": "Matt", "quantity": "", "site": "HQ"})
+        self.assertEqual(self.calls[0]["validate_only"], False)
+        self.assertEqual(len(self.calls), 4)
+
+
+class AsyncValidationTest(TestCase):
+    def test_sync_and_async_actions(self):
+        def action(request, object_pk, data):
+            return {"object_pk": object_pk, **data}, 200
+
+        async def async_action(request, data):
+            await asyncio.sleep(0)
+            return {"errors": {"name": ["Enter a name"]}}, 400
+
+        request = RequestFactory().post("/")
+        self.assertEqual(
+            asyncio.run(validate_data_unknown_async("1", action, request, {"name": "Matt"})),
+            {"object_pk": "1", "name": "Matt"},
+        )
+        self.assertEqual(
+            asyncio.run(validate_data_unknown_async(None, async_action, request, {})),
+            {"errors": {"name": ["Enter a name"]}},
+        )
+
+
+class AsyncViewTest(TestCase):
+    def test_async_views_are_coroutine_functions(self):
+        for view_class in [AsyncSingleFormView, AsyncMultiFormView, AsyncSummaryListFormView]:
+            view = view_class.as_view()
+            self.assertTrue(asyncio.iscoroutinefunction(view))
+            self.assertIs(view.view_class, view_class)
+        self.assertTrue(AsyncSummaryListFormView.as_view().csrf_exempt)
+
+
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = LocMemFragmentCache(max_bytes=10, max_fragment_bytes=6)
+
+    def test_evicts_least_recently_used_fragments_by_size(self):
+        self.cache.set("a", "aaaa")
+        self.cache.set("b", "bbbb")
+        self.cache.get("a")
+        self.cache.set("c", "cccc")
+        self.assertEqual(self.cache.get("a"), "aaaa")
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.size, 8)
+
+    def test_large_fragments_are_not_cached(self):
+        self.cache.set("a", "aaaaaaa")
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_django_cache(self):
+        cache = DjangoFragmentCache()
+        cache.set("a", "<p>a</p>")
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+
+    def test_django_cache_clear_leaves_other_keys(self):
+        cache = DjangoFragmentCache()
+        cache.set("a", "<p>a</p>")
+        cache.cache.set("session", "value")
+        cache.clear()
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.cache.get("session"), "value")
+
+    def test_fragment_key_depends_on_content(self):
+        self.assertEqual(fragment_key("label", "a", None), fragment_key("label", "a", None))
+        self.assertNotEqual(fragment_key("label", "a", None), fragment_key("label", "a", ["Error"]))
+
+    def test_fast_renderer_reuses_fragments(self):
+        cache = LocMemFragmentCache()
+        set_fragment_cache(cache)
+        self.addCleanup(set_fragment_cache, LocMemFragmentCache())
+        options = OptionSet([Option("gb", "United Kingdom"), Option("fr", "France")])
+        questions = [Label("Some text"), Select("country", options=options)]
+
+        first = FastRenderer(Context(), {}, {}).render(questions)
+        second = FastRenderer(Context(), {}, {}).render(questions)
+        self.assertEqual(first, second)
+        self.assertEqual(cache.info()["hits"], 2)
+
+        # Options are cached without the posted value, and match the options rendered without the cache
+        selected = FastRenderer(Context(), {"country": "fr"}, {}).render(questions)
+        self.assertEqual(cache.info()["hits"], 4)
+        self.assertEqual(cache.info()["size"], 2)
+        set_fragment_cache(None)
+        self.assertEqual(selected, FastRenderer(Context(), {"country": "fr"}, {}).render(questions))
+        self.assertIn('value="fr" selected', selected)
+        self.assertNotIn('value="gb" selected', selected)
+
+    def test_fast_renderer_marks_selected_autocomplete_options(self):
+        set_fragment_cache(LocMemFragmentCache())
+        self.addCleanup(set_fragment_cache, LocMemFragmentCache())
+        questions = [AutocompleteInput("country", OptionSet([Option("gb", "United Kingdom"), Option("fr", "France")]))]
+
+        FastRenderer(Context(), {}, {}).render(questions)
+        selected = FastRenderer(Context(), {"country": "gb"}, {}).render(questions)
+        set_fragment_cache(None)
+        self.assertEqual(selected, FastRenderer(Context(), {"country": "gb"}, {}).render(questions))
+        self.assertIn('value="gb" selected>', selected)
+
 
 class MarkdownTest(TestCase):
     def setUp(self):
@@ -191,6 +1260,40 @@ class MarkdownTest(TestCase):
         date = DateInput(prefix="Date", description=self.markdown_description)
         self.assertEqual(date.description, self.html_description)
 
+    def test_description_is_converted_when_first_read(self):
+        option = Option(key="a", value="A", description=self.markdown_description)
+        self.assertFalse(hasattr(option, "_description_html"))
+        self.assertEqual(option.description, self.html_description)
+        self.assertEqual(option._description_html, self.html_description)
+
+    def test_setting_description_resets_converted_value(self):
+        option = Option(key="a", value="A", description=self.markdown_description)
+        self.assertEqual(option.description, self.html_description)
+        option.description = "**b**"
+        self.assertEqual(option.description, "<strong>b</strong>")
+
+
+class MarkdownCacheTest(TestCase):
+    def test_cache_hits_and_misses(self):
+        cache = MarkdownCache()
+        self.assertEqual(cache.get("**a**"), "<strong>a</strong>")
+        self.assertEqual(cache.get("**a**"), "<strong>a</strong>")
+        self.assertEqual(cache.info()["hits"], 1)
+        self.assertEqual(cache.info()["misses"], 1)
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = MarkdownCache(maxsize=2)
+        cache.warm(["a", "b"])
+        cache.get("a")
+        cache.get("c")
+        self.assertEqual(list(cache._items), ["a", "c"])
+
+    def test_reducing_maxsize_evicts(self):
+        cache = MarkdownCache()
+        cache.warm(["a", "b", "c"])
+        cache.maxsize = 1
+        self.assertEqual(cache.info()["size"], 1)
+
 
 class SingleQuestionFormAccessibilityTest(TestCase):
     def test_no_questions_no_title_label(self):
@@ -0,0 +1,268 @@
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+
+from lite_forms.components import TreeNode
+
+
+def node_key(node):
+    """
+    Returns the key a node is looked up by - its key, or its value for groups without one
+    """
+    return node.key or node.value
+
+
+class CompactTree:
+    """
+    A tree stored as parallel arrays of keys, values and parent, first child and next sibling offsets, rather than
+    an object per node. Node 0 is the root. Use root (or TreeView) to read it as TreeNodes.
+    """
+
+    def __init__(self):
+        self.keys = [""]
+        self.values = [""]
+        self.parents = array("l", [-1])
+        self.first_children = array("l", [-1])
+        self.next_siblings = array("l", [-1])
+        self._last_children = array("l", [-1])
+
+    def __len__(self):
+        return len(self.keys) - 1
+
+    @property
+    def root(self):
+        return CompactTreeNode(self, 0)
+
+    def add(self, key, value, parent=0):
+        """
+        Adds a node as the last child of parent, returning its offset
+        """
+        index = len(self.keys)
+        self.keys.append(key)
+        self.values.append(value)
+        self.parents.append(parent)
+        self.first_children.append(-1)
+        self.next_siblings.append(-1)
+        self._last_children.append(-1)
+
+        last_child = self._last_children[parent]
+        if last_child == -1:
+            self.first_children[parent] = index
+        else:
+            self.next_siblings[last_child] = index
+        self._last_children[parent] = index
+        return index
+
+    def extend(self, items, parent=0, key="key", value="value", children="children", exclude=None):
+        """
+        Adds items shaped like those convert_list_to_tree takes, and their children, below parent
+        """
+        # add() is inlined, with the arrays bound locally, as this is the bulk of building a tree
+        keys, values, parents = self.keys, self.values, self.parents
+        first_children, next_siblings, last_children = self.first_children, self.next_siblings, self._last_children
+
+        stack = [(iter(items), parent)]
+        while stack:
+            items, parent = stack[-1]
+            for item in items:
+                if item.get(exclude):
+                    continue
+
+                index = len(keys)
+                keys.append(item[key])
+                values.append(item[value])
+                parents.append(parent)
+                first_children.append(-1)
+                next_siblings.append(-1)
+                last_children.append(-1)
+
+                last_child = last_children[parent]
+                if last_child == -1:
+                    first_children[parent] = index
+                else:
+                    next_siblings[last_child] = index
+                last_children[parent] = index
+
+                if children in item:
+                    stack.append((iter(item[children]), index))
+                    break
+            else:
+                stack.pop()
+
+    def children(self, index):
+        """
+        Returns the offsets of a node's children
+        """
+        child = self.first_children[index]
+        while child != -1:
+            yield child
+            child = self.next_siblings[child]
+
+    @classmethod
+    def from_list(cls, items, key="key", value="value", children="children", exclude=None):
+        """
+        Builds a tree from the same list convert_list_to_tree takes
+        """
+        tree = cls()
+        tree.extend(items, 0, key, value, children, exclude)
+        return tree
+
+    @classmethod
+    def from_dictionary(cls, dictionary, key="key", value="value", children="children", exclude=None):
+        """
+        Builds a tree from the same dictionary of groups convert_dictionary_to_tree takes
+        """
+        tree = cls()
+        for group, values in dictionary.items():
+            tree.extend(values, tree.add("", group), key, value, children, exclude)
+        return tree
+
+
+class CompactTreeNode:
+    """
+    A TreeNode-like view of a node in a CompactTree
+    """
+
+    __slots__ = ("tree", "index")
+
+    def __init__(self, tree, index):
+        self.tree = tree
+        self.index = index
+
+    @property
+    def key(self):
+        return self.tree.keys[self.index]
+
+    @property
+    def value(self):
+        return self.tree.values[self.index]
+
+    @property
+    def children(self):
+        return [CompactTreeNode(self.tree, child) for child in self.tree.children(self.index)]
+
+    def __eq__(self, other):
+        return isinstance(other, CompactTreeNode) and self.tree is other.tree and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self):
+        return f"CompactTreeNode({self.key!r}, {self.value!r})"
+
+
+class TreeIndex:
+    """
+    Index of a tree's nodes by key, so that a node's children can be found without walking the tree
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.nodes = {}
+
+        stack = list(root.children)
+        while stack:
+            node = stack.pop()
+            self.nodes.setdefault(node_key(node), node)
+            stack.extend(node.children)
+
+    def get(self, key):
+        return self.nodes.get(key)
+
+    def children(self, key=None):
+        """
+        Returns the children of the node with the given key, or the top level nodes if key is None
+        """
+        if key is None:
+            return self.root.children
+
+        node = self.nodes.get(key)
+        if node is None:
+            raise KeyError(key)
+        return node.children
+
+
+def tree_fingerprint(root):
+    """
+    Returns a fingerprint of the keys, values and shape of the tree below a TreeNode or CompactTreeNode
+    """
+    fingerprint = hashlib.sha1()
+    if isinstance(root, CompactTreeNode) and root.index == 0:
+        tree = root.tree
+        fingerprint.update(repr((tree.keys, tree.values)).encode())
+        fingerprint.update(tree.parents.tobytes())
+        return fingerprint.hexdigest()
+
+    stack = [iter(root.children)]
+    while stack:
+        for node in stack[-1]:
+            fingerprint.update(f"{node.key!r}\x1e{node.value!r}\x1f".encode())
+            stack.append(iter(node.children))
+            break
+        else:
+            stack.pop()
+            fingerprint.update(b"\x1d")
+    return fingerprint.hexdigest()
+
+
+_trees = {}
+_indexes = {}
+# Fingerprints of the trees registered by TreeViews, least recently used first
+_fingerprints = OrderedDict()
+_lock = threading.Lock()
+MAX_TREE_VIEW_TREES = 128
+
+
+def register_tree(tree_id, tree, replace=True, fingerprint=None):
+    """
+    Registers a tree for its children to be loaded by TreeChildrenView
+    tree can be a TreeNode, a list of TreeNodes, a CompactTree or a function returning one of them,
+    which is called when first needed
+    TreeViews register their trees with their fingerprint, so that the same tree isn't registered again,
+    and only the last MAX_TREE_VIEW_TREES of them used are kept
+    """
+    with _lock:
+        if tree_id in _trees and (not replace or (fingerprint and _fingerprints.get(tree_id) == fingerprint)):
+            if tree_id in _fingerprints:
+                _fingerprints.move_to_end(tree_id)
+            return
+
+        _trees[tree_id] = tree
+        _indexes.pop(tree_id, None)
+        _fingerprints.pop(tree_id, None)
+        if fingerprint:
+            _fingerprints[tree_id] = fingerprint
+            while len(_fingerprints) > MAX_TREE_VIEW_TREES:
+                oldest, _ = _fingerprints.popitem(last=False)
+                _trees.pop(oldest, None)
+                _indexes.pop(oldest, None)
+
+
+def get_tree_index(tree_id):
+    """
+    Returns the index of a registered tree, building it the first time it's needed
+    """
+    with _lock:
+        if tree_id in _fingerprints:
+            _fingerprints.move_to_end(tree_id)
+
+        index = _indexes.get(tree_id)
+        if index is not None:
+            return index
+
+        source = tree = _trees[tree_id]
+
+    if callable(tree):
+        tree = tree()
+    if isinstance(tree, CompactTree):
+        tree = tree.root
+    elif isinstance(tree, list):
+        tree = TreeNode("", "", tree)
+    index = TreeIndex(tree)
+
+    with _lock:
+        # Only keep the index if the tree hasn't been replaced while it was being built
+        if _trees.get(tree_id) is source:
+            _indexes.setdefault(tree_id, index)
+    return index
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from lite_forms.views import OptionSearchView, TreeChildrenView
+
+app_name = "lite_forms"
+
+urlpatterns = [
+    path("trees/<str:tree_id>/children/", TreeChildrenView.as_view(), name="tree_children"),
+    path("options/<str:search_id>/", OptionSearchView.as_view(), name="option_search"),
+]
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import secrets
+
+from django.core.cache import caches
+
+from lite_forms.helpers import validate_data_unknown
+
+
+class ValidationCache:
+    """
+    Caches the results of validating data with an action, so that submitting a form again with the same data
+    (such as when changing an answer from the summary list and returning without changing it) skips the call
+    Results are kept in one of Django's caches for timeout seconds, for the session they were validated in,
+    until invalidate is called for the session
+    Requests without a session are always validated, as their results can't be kept apart from other users'
+    Only use it for actions which validate without saving anything
+    """
+
+    def __init__(self, alias="default", timeout=5 * 60, key_prefix="lite-forms-validation"):
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _session_key(self, request):
+        session = getattr(request, "session", None)
+        return getattr(session, "session_key", None)
+
+    def _generation_key(self, request):
+        return f"{self.key_prefix}:generation:{self._session_key(request)}"
+
+    def key(self, request, action, object_pk, data):
+        """
+        Returns the cache key for validating data with an action, from a stable hash of the data
+        """
+        fingerprint = hashlib.sha1(
+            json.dumps(
+                [
+                    getattr(action, "__module__", ""),
+                    getattr(action, "__qualname__", repr(action)),
+                    str(object_pk),
+                    data,
+                ],
+                sort_keys=True,
+                default=str,
+            ).encode()
+        ).hexdigest()
+        generation = self.cache.get(self._generation_key(request), "")
+        return f"{self.key_prefix}:{self._session_key(request)}:{generation}:{fingerprint}"
+
+    def validate(self, request, action, object_pk, data):
+        """
+        Returns the result of validating data with an action, calling it only if the same data
+        hasn't been validated recently
+        """
+        if not self._session_key(request):
+            return validate_data_unknown(object_pk, action, request, data)
+
+        key = self.key(request, action, object_pk, data)
+        result = self.cache.get(key)
+        if result is None:
+            result = validate_data_unknown(object_pk, action, request, data)
+            self.cache.set(key, result, self.timeout)
+        return result
+
+    def invalidate(self, request):
+        """
+        Forgets every result cached for the request's session
+        """
+        if not self._session_key(request):
+            return
+
+        # Results are keyed on a generation which is replaced, so that they don't need to be found to be deleted.
+        # It expires with the results cached before it
+        self.cache.set(self._generation_key(request), secrets.token_hex(8), self.timeout)
@@ -1,12 +1,20 @@
-import copy
+import asyncio
+import functools
 from abc import ABC
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse, HttpResponse
 from django.shortcuts import redirect, render
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
-from django.views.generic import TemplateView
+from django.views.generic import TemplateView, View
 from s3chunkuploader.file_handler import S3FileUploadHandler
 
 from lite_forms.components import FormGroup, Form
@@ -14,18 +22,43 @@ from lite_forms.generators import form_page
 from lite_forms.helpers import (
     handle_lists,
     get_next_form,
+    get_form_by_pk,
     nest_data,
     flatten_data,
     remove_unused_errors,
     convert_form_to_summary_list_instance,
     insert_hidden_fields,
-    get_all_form_components,
+    compile_form,
+    get_form_component_index,
     validate_data_unknown,
+    validate_data_unknown_async,
+    get_summary_list_sections,
 )
-from lite_forms.submitters import submit_paged_form
+from lite_forms.options import get_option_index
+from lite_forms.renderers import use_streaming, stream_template, stream_template_chunks, render_tree
+from lite_forms.state import STATE_TOKEN, get_state_store, load_state, merge_state, insert_state_token
+from lite_forms.submitters import submit_paged_form, submit_paged_form_async
+from lite_forms.templatetags.custom_tags import dict_hidden_field, state_token_field
+from lite_forms.trees import get_tree_index, node_key
+
+try:
+    from asgiref.sync import markcoroutinefunction
+except ImportError:  # asgiref < 3.6
+
+    def markcoroutinefunction(func):
+        """
+        Returns a coroutine function calling func, which returns a coroutine, so that it's detected as async
+        """
+
+        async def wrapper(*args, **kwargs):
+            return await func(*args, **kwargs)
+
+        return functools.update_wrapper(wrapper, func)
+
 
 ACTION = "_action"
 VALIDATE_ONLY = "validate_only"
+VALIDATE_STEP = "validate_step"
 
 
 class Actions:
@@ -146,6 +179,8 @@ class MultiFormView(FormView):
 
     forms: FormGroup = None
     additional_context: dict = {}
+    # A WizardStateStore to keep answers in between forms, rather than passing them on as hidden fields
+    state_store = None
 
     def get_forms(self):
         if not self.forms:
@@ -184,6 +219,7 @@ class MultiFormView(FormView):
             object_pk=self.get_object_pk(),
             inject_data=self.get_data(),
             additional_context=self.additional_context,
+            state_store=get_state_store(self.state_store),
         )
 
         # If there are more forms to go through, continue
@@ -241,10 +277,26 @@ class SummaryListFormView(FormView):
     _validated_data = {}
     hide_components: List = None
     validate_only_until_final_submission = True
+    # Only send the current form's fields (and those it depends on) to the action until the final submission,
+    # with VALIDATE_STEP set to the form's pk
+    validate_current_form_only = False
+    # The fields from other forms each form's validation depends on, by form pk
+    form_dependencies: dict = {}
+    # A ValidationCache to reuse the results of validating forms which are submitted again unchanged,
+    # until the final submission
+    validation_cache = None
+    # If submitting everything from the summary list fails, validate each form's fields (and those it depends on)
+    # with the action concurrently, on up to max_concurrent_validations threads, to find the first form with errors
+    validate_forms_concurrently = False
+    max_concurrent_validations = 4
     additional_context: dict = {}
     cancel_link_prefix = "or "
     cancel_link_text = ""
     cancel_link_url = ""
+    stream_summary_list: bool = None
+    # A WizardStateStore to keep answers in between forms, rather than passing them on as hidden fields
+    state_store = None
+    _state_token = None
 
     def get_forms(self):
         if not self.forms:
@@ -263,6 +315,8 @@ class SummaryListFormView(FormView):
             del data["form_pk"]
         while ACTION in data:
             del data[ACTION]
+        while STATE_TOKEN in data:
+            del data[STATE_TOKEN]
         return data
 
     def prettify_data(self, data):
@@ -283,23 +337,129 @@ class SummaryListFormView(FormView):
     def generate_summary_list(self):
         self.init(self.request, **self.kwargs)
         data = self.clean_data(self.get_validated_data())
+        pretty_data = self.prettify_data(data.copy())
+        hide_components = self.hide_components if self.hide_components else {}
         context = {
             "forms": self.get_forms(),
+            "summary_list": get_summary_list_sections(self.get_forms(), data, pretty_data, hide_components),
             "data": data,
-            "pretty_data": self.prettify_data(data.copy()),
+            "data_hidden_fields": self.get_data_hidden_fields(data),
+            "pretty_data": pretty_data,
             "title": self.summary_list_title,
             "button": self.summary_list_button,
             "notice_title": self.summary_list_notice_title,
             "notice": self.summary_list_notice_text,
-            "hide_components": self.hide_components if self.hide_components else {},
+            "hide_components": hide_components,
             "cancel_link_prefix": self.cancel_link_prefix,
             "cancel_link_text": self.cancel_link_text,
             "cancel_link_url": self.cancel_link_url,
             "hide_titles": self.hide_titles,
             **self.additional_context,
         }
+
+        if use_streaming(self.stream_summary_list):
+            return stream_template(
+                self.request,
+                "summary-list.html",
+                context,
+                lambda context: stream_template_chunks(
+                    context, "summary-list-section.html", "section", context["summary_list"]
+                ),
+            )
+
         return render(self.request, "summary-list.html", context)
 
+    def get_data_hidden_fields(self, data):
+        if self._state_token:
+            return state_token_field(self._state_token)
+        return mark_safe("".join(dict_hidden_field(key, value) for key, value in data.items()))
+
+    def get_extra_data(self, form):
+        extra_data = {"form_pk": form.pk, **self.additional_context}
+        if self._state_token:
+            extra_data["state_token"] = self._state_token
+        return extra_data
+
+    def insert_hidden_fields(self, form):
+        """
+        Adds the answers given so far to a form as hidden fields, or just the state token if they're stored
+        """
+        if self._state_token:
+            insert_state_token(form, self._state_token)
+        else:
+            insert_hidden_fields(self.get_validated_data(), form)
+
+    def get_form_dependencies(self, form):
+        """
+        Returns the names of fields from other forms that a form's validation depends on - nested fields are included
+        with their parent, eg "site" includes "site.name"
+        """
+        return self.form_dependencies.get(form.pk, ())
+
+    def get_form_data(self, form):
+        """
+        Returns the data a form is validated with - only its own fields and the ones it depends on
+        if validate_current_form_only is set, otherwise everything answered so far
+        """
+        data = self.get_validated_data()
+        if not self.validate_current_form_only:
+            return data
+
+        return self.get_step_data(form, data)
+
+    def get_step_data(self, form, data):
+        """
+        Returns the fields in data a form's validation needs - its own and the ones it depends on -
+        with VALIDATE_STEP set to the form's pk
+        """
+        component_index = get_form_component_index(form)
+        dependencies = tuple(self.get_form_dependencies(form))
+        prefixes = tuple(dependency + "." for dependency in dependencies)
+        form_data = {
+            key: value
+            for key, value in data.items()
+            if key in component_index or key in dependencies or key.startswith(prefixes)
+        }
+        form_data[VALIDATE_ONLY] = data.get(VALIDATE_ONLY, False)
+        form_data[VALIDATE_STEP] = form.pk
+        return form_data
+
+    def validate_form_data(self, request, data):
+        """
+        Validates a form's data with the action, reusing the result of validating the same data before
+        if there's a validation_cache and nothing's being saved until the final submission
+        """
+        if self.validation_cache and self.validate_only_until_final_submission:
+            return self.validation_cache.validate(request, self.get_action(), self.get_object_pk(), data)
+        return validate_data_unknown(self.get_object_pk(), self.get_action(), request, data)
+
+    def validate_steps(self, request, steps):
+        """
+        Validates the data for each form (by form pk) with the action concurrently, returning the results by form pk
+        """
+        workers = max(1, min(self.max_concurrent_validations, len(steps)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda data: self.validate_form_data(request, data), steps.values())
+            return dict(zip(steps, results))
+
+    def validate_forms(self, request, data=None):
+        """
+        Validates each form separately with data (by default the answers given so far), returning the errors
+        for the forms with any by form pk, in the forms' order
+        """
+        forms = self.get_forms().forms
+        data = {**(self.get_validated_data() if data is None else data), VALIDATE_ONLY: True}
+        results = self.validate_steps(request, {form.pk: nest_data(self.get_step_data(form, data)) for form in forms})
+
+        errors = {}
+        for form in forms:
+            form_errors = results[form.pk].get("errors")
+            if form_errors:
+                form_errors = remove_unused_errors(flatten_data(form_errors), form)
+            if form_errors:
+                errors[form.pk] = form_errors
+        return errors
+
     def get(self, request, **kwargs):
         self.init(request, **kwargs)
 
@@ -321,17 +481,28 @@ class SummaryListFormView(FormView):
         form_pk = str(self.get_validated_data().get("form_pk", ""))
         post_errors = None
 
+        state_store = get_state_store(self.state_store)
+        if state_store:
+            self._state_token, state = load_state(state_store, request)
+            # Only clear a form's earlier answers when its fields have been posted
+            form = get_form_by_pk(form_pk, self.get_forms()) if form_pk and action != Actions.CHANGE else None
+            self._validated_data = merge_state(state, self._validated_data, form)
+
         post_function = getattr(self, f"post_form_{form_pk}", None)
         if post_function:
             post_errors = post_function(request, **kwargs)
 
+        if state_store:
+            state_store.save(request, self._state_token, self.clean_data(self._validated_data))
+
         if self.validate_only_until_final_submission:
             self._validated_data[VALIDATE_ONLY] = True
 
         if form_pk:
             return self.get_next_form_page(form_pk, action, request, post_errors)
         elif action == Actions.FINISH:
-            self._validated_data = nest_data(self.get_validated_data())
+            data = self.get_validated_data()
+            self._validated_data = nest_data(data)
             self._validated_data[VALIDATE_ONLY] = False
 
             validated_data = validate_data_unknown(
@@ -339,11 +510,31 @@ class SummaryListFormView(FormView):
             )
 
             if "errors" not in validated_data:
+                if state_store:
+                    state_store.delete(request, self._state_token)
+                if self.validation_cache:
+                    self.validation_cache.invalidate(request)
+
                 if self.success_message:
                     messages.success(self.request, self.success_message)
 
                 return redirect(self.get_success_url())
 
+            if self.validate_forms_concurrently:
+                errors = self.validate_forms(request, data)
+                if errors:
+                    # Send the user back to the first form with errors (which are in the forms' order)
+                    self._validated_data = data
+                    form = get_form_by_pk(next(iter(errors)), self.get_forms())
+                    self.insert_hidden_fields(form)
+                    return form_page(
+                        request,
+                        convert_form_to_summary_list_instance(form),
+                        data=data,
+                        errors=errors[form.pk],
+                        extra_data=self.get_extra_data(form),
+                    )
+
         if self.validate_only_until_final_submission:
             return self.generate_summary_list()
 
@@ -359,17 +550,15 @@ class SummaryListFormView(FormView):
         return self._post(request, **kwargs)
 
     def get_next_form_page(self, form_pk, action, request, post_errors):
-        form = copy.deepcopy(next(form for form in self.get_forms().forms if str(form.pk) == form_pk))
+        form = get_form_by_pk(form_pk, self.get_forms())
 
         # Add form fields to validated_data if they dont exist
-        for component in get_all_form_components(form):
+        for component in compile_form(form).components:
             if component.name not in self._validated_data and component.name[:-2] not in self._validated_data:
                 self._validated_data[component.name] = ""
 
         if action == Actions.SUBMIT or action == Actions.RETURN:
-            validated_data = validate_data_unknown(
-                self.get_object_pk(), self.get_action(), request, nest_data(self.get_validated_data())
-            )
+            validated_data = self.validate_form_data(request, nest_data(self.get_form_data(form)))
             validated_data["errors"] = validated_data.get("errors", {})
             errors = validated_data["errors"]
             if post_errors:
@@ -379,38 +568,31 @@ class SummaryListFormView(FormView):
                 errors = flatten_data(validated_data["errors"])
                 errors = remove_unused_errors(errors, form)
             if errors:
-                insert_hidden_fields(self.get_validated_data(), form)
+                self.insert_hidden_fields(form)
 
                 if action == Actions.RETURN:
                     form = convert_form_to_summary_list_instance(form)
 
                 return form_page(
-                    request,
-                    form,
-                    data=self.get_validated_data(),
-                    errors=errors,
-                    extra_data={"form_pk": form.pk, **self.additional_context},
+                    request, form, data=self.get_validated_data(), errors=errors, extra_data=self.get_extra_data(form),
                 )
 
             if action != Actions.RETURN:
                 next_form = get_next_form(form.pk, self.get_forms())
 
                 if next_form:
-                    insert_hidden_fields(self.get_validated_data(), next_form)
+                    self.insert_hidden_fields(next_form)
 
                     return form_page(
-                        request,
-                        next_form,
-                        data=self.get_validated_data(),
-                        extra_data={"form_pk": next_form.pk, **self.additional_context},
+                        request, next_form, data=self.get_validated_data(), extra_data=self.get_extra_data(next_form),
                     )
         elif action == Actions.CHANGE:
-            insert_hidden_fields(self.get_validated_data(), form)
+            self.insert_hidden_fields(form)
             return form_page(
                 request,
                 convert_form_to_summary_list_instance(form),
                 data=self.get_validated_data(),
-                extra_data={"form_pk": form.pk, **self.additional_context},
+                extra_data=self.get_extra_data(form),
             )
 
         if self.validate_only_until_final_submission:
@@ -418,19 +600,260 @@ class SummaryListFormView(FormView):
 
         return redirect(request.path)
 
-    @csrf_exempt
-    def dispatch(self, request, *args, **kwargs):
+    def get_handler(self, request):
+        """
+        Returns the method to handle a request with, or None if its method isn't allowed
+        """
         forms = [4]
         self.request.upload_handlers.insert(0, FormS3FileUploadHandler(forms, request))
 
         if request.method.lower() in self.http_method_names:
             if request.method.lower() == "post":
                 if request.POST.get("form_pk") and int(request.POST.get("form_pk")) in forms:
-                    return self.post(request, **kwargs)
+                    return self.post
                 else:
-                    return self.post_with_protection(request, **kwargs)
+                    return self.post_with_protection
             else:
-                return self.get(request, **kwargs)
+                return self.get
+
+    @csrf_exempt
+    def dispatch(self, request, *args, **kwargs):
+        handler = self.get_handler(request)
+        if handler:
+            return handler(request, **kwargs)
 
         handler = self.http_method_not_allowed
         return handler(request, *args, **kwargs)
+
+
+# Async views
+#
+# Django 3.2 doesn't detect async handlers on class based views, so these mark their views as coroutine functions.
+# Actions can be async, or sync, in which case they're run in a thread. Hooks such as init are run in a thread
+# unless they're async.
+
+
+class AsyncViewMixin:
+    """
+    Mixin for views with async handlers
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return markcoroutinefunction(super().as_view(**initkwargs))
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        return super().http_method_not_allowed(request, *args, **kwargs)
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
+
+    async def run(self, hook, *args, **kwargs):
+        """
+        Calls a hook, awaiting it if it's async and running it in a thread otherwise
+        """
+        if asyncio.iscoroutinefunction(hook):
+            return await hook(*args, **kwargs)
+        return await sync_to_async(hook)(*args, **kwargs)
+
+
+class AsyncFormView(AsyncViewMixin, FormView, ABC):
+    """
+    FormView with async handlers
+    """
+
+
+class AsyncSingleFormView(AsyncViewMixin, SingleFormView):
+    """
+    SingleFormView with async handlers, which awaits its action
+    """
+
+    async def get(self, request, **kwargs):
+        override_return = await self.run(self.init, request, **kwargs)  # noqa
+        if override_return:
+            if isinstance(override_return, str):
+                return redirect(override_return)
+            return override_return
+        return await sync_to_async(form_page)(request, self.get_form(), data=self.get_data(), extra_data=self.context)
+
+    async def post(self, request, **kwargs):
+        await self.run(self.init, request, **kwargs)
+        data = await self.run(self.on_submission, request, **kwargs)
+
+        # Handle lists (such as checkboxes)
+        data = handle_lists(data)
+
+        self._validated_data = data
+
+        cleaned_data = await self.run(self.clean_data, data.copy())
+        validated_data = await validate_data_unknown_async(
+            self.get_object_pk(), self.get_action(), request, cleaned_data
+        )
+
+        if "errors" in validated_data:
+            return await sync_to_async(form_page)(
+                request, self.get_form(), data=data, errors=validated_data.get("errors"), extra_data=self.context
+            )
+
+        self._validated_data = validated_data
+
+        await self.run(self.post_success_step)
+
+        if self.redirect:
+            return redirect(self.get_success_url())
+        else:
+            return await sync_to_async(form_page)(request, self.get_form(), data=data)
+
+
+class AsyncMultiFormView(AsyncViewMixin, MultiFormView):
+    """
+    MultiFormView with async handlers, which awaits its action
+    """
+
+    async def get(self, request, **kwargs):
+        await self.run(self.init, request, **kwargs)
+        form = self.get_forms().forms[0]
+        return await sync_to_async(form_page)(
+            request, form, data=self.get_data(), extra_data={"form_pk": form.pk, **self.additional_context}
+        )
+
+    async def post(self, request, **kwargs):
+        await self.run(self.init, request, **kwargs)
+        submission = await self.run(self.on_submission, request, **kwargs)  # noqa
+
+        if submission:
+            return redirect(submission)
+
+        response, data = await submit_paged_form_async(
+            request,
+            self.get_forms(),
+            self.get_action(),
+            object_pk=self.get_object_pk(),
+            inject_data=self.get_data(),
+            additional_context=self.additional_context,
+            state_store=get_state_store(self.state_store),
+        )
+
+        # If there are more forms to go through, continue
+        if response:
+            return response
+
+        self._validated_data = data
+
+        await self.run(self.post_success_step)
+
+        return redirect(self.get_success_url())
+
+
+class AsyncSummaryListFormView(AsyncViewMixin, SummaryListFormView):
+    """
+    SummaryListFormView with async handlers
+    Requests are handled in a thread (one not shared with other requests for submissions), from which async actions
+    are run on the event loop, so its hooks can't be async
+    """
+
+    def get_action(self):
+        action = super().get_action()
+        if asyncio.iscoroutinefunction(action):
+            return async_to_sync(action)
+        return action
+
+    def validate_steps(self, request, steps):
+        """
+        Validates the data for each form with an async action on the event loop, together, unless results are cached
+        """
+        action = super().get_action()
+        if not asyncio.iscoroutinefunction(action) or (
+            self.validation_cache and self.validate_only_until_final_submission
+        ):
+            return super().validate_steps(request, steps)
+
+        async def validate():
+            return await asyncio.gather(
+                *(validate_data_unknown_async(self.get_object_pk(), action, request, data) for data in steps.values())
+            )
+
+        return dict(zip(steps, async_to_sync(validate)()))
+
+    async def get(self, request, **kwargs):
+        return await sync_to_async(super().get)(request, **kwargs)
+
+    async def post(self, request, **kwargs):
+        return await sync_to_async(super().post, thread_sensitive=False)(request, **kwargs)
+
+    async def post_with_protection(self, request, **kwargs):
+        return await sync_to_async(super().post_with_protection, thread_sensitive=False)(request, **kwargs)
+
+    @csrf_exempt
+    async def dispatch(self, request, *args, **kwargs):
+        # Reading the request's POST data can upload files, so it's done in a thread
+        handler = await sync_to_async(self.get_handler)(request)
+        if handler:
+            return await handler(request, **kwargs)
+
+        return await self.http_method_not_allowed(request, *args, **kwargs)
+
+
+class TreeChildrenView(LoginRequiredMixin, View):
+    """
+    Returns the children of a node in a registered tree, for lazy TreeViews
+    Returns an HTML fragment of checkboxes for the TreeView named by ?name=, or JSON with ?format=json
+    Registered trees aren't scoped to a user, so only logged in users can read them (others get a 403)
+    """
+
+    raise_exception = True
+
+    def get(self, request, tree_id, **kwargs):
+        key = request.GET.get("key")
+        try:
+            index = get_tree_index(tree_id)
+            children = index.children(key)
+        except KeyError:
+            raise Http404
+
+        if request.GET.get("format") == "json":
+            return JsonResponse(
+                [
+                    {"key": node_key(node), "value": node.value, "has_children": bool(node.children)}
+                    for node in children
+                ],
+                safe=False,
+            )
+
+        node = index.root if key is None else index.get(key)
+        html = render_tree(request.GET.get("name", ""), node, None, max_depth=1, children_url=request.path)
+        return HttpResponse(html)
+
+
+class OptionSearchView(LoginRequiredMixin, View):
+    """
+    Returns the options registered under search_id best matching ?q= as JSON, for remote AutocompleteInputs and
+    TokenBars - at most ?limit= of them, up to max_results
+    Responses can be cached privately by the browser for max_age seconds (the LITE_FORMS_OPTION_SEARCH_MAX_AGE
+    setting, 300 by default)
+    As with TreeChildrenView, only logged in users can search registered options
+    """
+
+    raise_exception = True
+    max_results = 50
+    max_age = None
+
+    def get(self, request, search_id, **kwargs):
+        try:
+            index = get_option_index(search_id)
+        except KeyError:
+            raise Http404
+
+        try:
+            limit = min(int(request.GET.get("limit", 10)), self.max_results)
+        except ValueError:
+            limit = 10
+
+        options = index.search(request.GET.get("q", ""), limit)
+        response = JsonResponse([{"key": option.key, "value": option.value} for option in options], safe=False)
+
+        max_age = self.max_age
+        if max_age is None:
+            max_age = getattr(settings, "LITE_FORMS_OPTION_SEARCH_MAX_AGE", 300)
+        patch_cache_control(response, private=True, max_age=max_age)
+        return response